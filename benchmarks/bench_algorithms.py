@@ -0,0 +1,91 @@
+"""Sign/verify throughput per signing algorithm on the application's Payload.
+
+Run from the project root:
+
+    python -m benchmarks.bench_algorithms --seconds 2 --json algorithms.json
+"""
+
+import argparse
+import datetime
+import json
+import time
+from typing import Callable
+
+from jwt import decode, encode
+
+from src.auth.schemas import Payload
+from .keys import PRIVATE_KEY_FACTORIES, generate_keys
+
+
+def make_payload() -> dict:
+    now = datetime.datetime.now(datetime.UTC)
+    return Payload(
+        sub=123456,
+        exp=(now + datetime.timedelta(minutes=5)).timestamp(),
+        iat=now.timestamp(),
+        token_type="access",
+        email="benchmark.user@example.com",
+        roles=["user"],
+        ver=1,
+        claims_iat=now.timestamp(),
+    ).model_dump()
+
+
+def throughput(func: Callable[[], object], seconds: float) -> float:
+    operations = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        func()
+        operations += 1
+    return operations / (time.perf_counter() - started)
+
+
+def bench_algorithm(algorithm: str, seconds: float) -> dict:
+    keys = generate_keys(algorithm)
+    payload = make_payload()
+    headers = {"kid": keys.kid}
+    token = encode(payload, keys.private_key, algorithm=algorithm, headers=headers)
+
+    return {
+        "algorithm": algorithm,
+        "token_bytes": len(token),
+        "sign_per_second": throughput(
+            lambda: encode(
+                payload, keys.private_key, algorithm=algorithm, headers=headers
+            ),
+            seconds,
+        ),
+        "verify_per_second": throughput(
+            lambda: decode(token, keys.public_key, algorithms=[algorithm]), seconds
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--algorithms", nargs="+", default=list(PRIVATE_KEY_FACTORIES))
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = [
+        bench_algorithm(algorithm, args.seconds) for algorithm in args.algorithms
+    ]
+
+    print(f"{'algorithm':<10} {'token bytes':>12} {'sign/s':>12} {'verify/s':>12}")
+    for result in results:
+        print(
+            f"{result['algorithm']:<10} {result['token_bytes']:>12} "
+            f"{result['sign_per_second']:>12.0f} {result['verify_per_second']:>12.0f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
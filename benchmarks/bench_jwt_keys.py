@@ -0,0 +1,70 @@
+"""Per-token cost of signing and verifying with PEM strings vs preloaded keys.
+
+Run from the project root:
+
+    python -m benchmarks.bench_jwt_keys --iterations 2000
+"""
+
+import argparse
+import datetime
+import timeit
+
+from jwt import decode, encode
+
+from src.auth.schemas import Payload
+from src.utils.jwt_keys import JWTKeys
+from .keys import generate_pem_pair
+
+ALGORITHM = "RS256"
+
+
+def make_payload() -> dict:
+    now = datetime.datetime.now(datetime.UTC)
+    return Payload(
+        sub=1,
+        exp=(now + datetime.timedelta(minutes=5)).timestamp(),
+        iat=now.timestamp(),
+        token_type="access",
+    ).model_dump()
+
+
+def per_call_us(func, iterations: int) -> float:
+    return timeit.timeit(func, number=iterations) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    private_pem, public_pem = generate_pem_pair(ALGORITHM)
+    keys = JWTKeys(ALGORITHM, private_pem, public_pem)
+    payload = make_payload()
+    token = encode(payload, keys.private_key, algorithm=ALGORITHM)
+
+    results = {
+        "sign (PEM)": lambda: encode(payload, private_pem, algorithm=ALGORITHM),
+        "sign (preloaded)": lambda: encode(
+            payload, keys.private_key, algorithm=ALGORITHM
+        ),
+        "verify (PEM)": lambda: decode(token, public_pem, algorithms=[ALGORITHM]),
+        "verify (preloaded)": lambda: decode(
+            token, keys.public_key, algorithms=[ALGORITHM]
+        ),
+    }
+
+    timings = {
+        name: per_call_us(func, args.iterations) for name, func in results.items()
+    }
+    for name, value in timings.items():
+        print(f"{name:<20} {value:>10.1f} us/token")
+
+    for stage in ("sign", "verify"):
+        saved = timings[f"{stage} (PEM)"] - timings[f"{stage} (preloaded)"]
+        print(f"{stage} saving:{saved:>17.1f} us/token")
+
+
+if __name__ == "__main__":
+    main()
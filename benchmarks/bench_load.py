@@ -0,0 +1,284 @@
+"""Latency and throughput of the auth endpoints under concurrent load.
+
+The application runs in process behind an ASGI transport, against the database
+from the settings or a SQLite stand-in. Run from the project root:
+
+    python -m benchmarks.bench_load --users 200 --seconds 5 --save baseline.json
+    python -m benchmarks.bench_load --sqlite bench.db --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Awaitable, Callable
+
+import httpx
+from sqlalchemy import event
+
+PASSWORD = "benchmark-password"
+SCENARIOS = ("login", "me", "refresh", "users")
+
+
+def percentiles(samples: list[float]) -> dict:
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def reset(self) -> None:
+        self.samples.clear()
+
+    def wrap_async(self, stage: str, func: Callable[..., Awaitable]) -> Callable:
+        @wraps(func)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - started)
+
+        return timed
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        @wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - started)
+
+        return timed
+
+    def instrument(self) -> None:
+        from src.database import engine_router
+        from src.utils.hash_password import HashPasswordABC
+        from src.utils.jwt_token import JWTToken
+
+        for name in ("hash_password_async", "validate_password_async"):
+            func = getattr(HashPasswordABC, name).__func__
+            setattr(HashPasswordABC, name, classmethod(self.wrap_async("hash", func)))
+        for name, stage in (("create_jwt", "sign"), ("decode", "verify")):
+            func = getattr(JWTToken, name).__func__
+            setattr(JWTToken, name, classmethod(self.wrap(stage, func)))
+
+        for engine in (engine_router.primary, *engine_router.replicas):
+            event.listen(engine.sync_engine, "before_cursor_execute", self._db_start)
+            event.listen(engine.sync_engine, "after_cursor_execute", self._db_end)
+
+    @staticmethod
+    def _db_start(conn, cursor, statement, parameters, context, executemany):
+        context._bench_started = time.perf_counter()
+
+    def _db_end(self, conn, cursor, statement, parameters, context, executemany):
+        self.samples["db"].append(time.perf_counter() - context._bench_started)
+
+    def report(self) -> dict:
+        return {
+            stage: {"count": len(samples), **percentiles(samples)}
+            for stage, samples in sorted(self.samples.items())
+        }
+
+
+class LoadTest:
+    def __init__(self, app, users: int, concurrency: int, seconds: float) -> None:
+        self.transport = httpx.ASGITransport(app=app)
+        self.users = users
+        self.concurrency = concurrency
+        self.seconds = seconds
+        self.emails = [f"bench{idx}@example.com" for idx in range(users)]
+        self.cursors: dict[int, str | None] = {}
+        self.stages = StageTimer()
+        self.stages.instrument()
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=self.transport, base_url="http://bench")
+
+    async def seed(self) -> None:
+        from src.database import UnitOfWork
+        from src.repositories.base import SQLAlchemyRepository
+        from src.users.models import User
+        from src.users.schemas import UserCreate
+        from src.utils.hash_password import password_hasher
+
+        # One hash for everybody: seeding should not take longer than the run.
+        hashed = await password_hasher().hash_password_async(PASSWORD)
+        async with UnitOfWork() as uow:
+            repository = SQLAlchemyRepository(User, uow)
+            await repository.create_many(
+                [UserCreate(email=email, password=hashed) for email in self.emails]
+            )
+
+    async def login(self, client: httpx.AsyncClient) -> int:
+        response = await client.post(
+            "/auth/login",
+            json={"email": random.choice(self.emails), "password": PASSWORD},
+        )
+        return response.status_code
+
+    async def me(self, client: httpx.AsyncClient) -> int:
+        return (await client.get("/auth/me")).status_code
+
+    async def refresh(self, client: httpx.AsyncClient) -> int:
+        return (await client.get("/auth/refresh-jwt-token")).status_code
+
+    async def users_page(self, client: httpx.AsyncClient) -> int:
+        params: dict[str, int | str] = {"limit": 100}
+        if cursor := self.cursors.get(id(client)):
+            params["after_id"] = cursor
+        response = await client.get("/users/", params=params)
+        self.cursors[id(client)] = response.headers.get("x-next-cursor")
+        return response.status_code
+
+    async def run(self, scenario: str) -> dict:
+        request = {
+            "login": self.login,
+            "me": self.me,
+            "refresh": self.refresh,
+            "users": self.users_page,
+        }[scenario]
+        clients = [self.client() for _ in range(self.concurrency)]
+        if scenario in ("me", "refresh"):
+            # Sessions are set up before the clock starts.
+            await asyncio.gather(*(self.login(client) for client in clients))
+
+        self.stages.reset()
+        latencies: list[float] = []
+        errors = 0
+        deadline = time.perf_counter() + self.seconds
+
+        async def worker(client: httpx.AsyncClient) -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                status = await request(client)
+                latencies.append(time.perf_counter() - started)
+                if status >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for client in clients))
+        elapsed = time.perf_counter() - started
+        for client in clients:
+            await client.aclose()
+
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": len(latencies) / elapsed,
+            **percentiles(latencies),
+            "stages": self.stages.report(),
+        }
+
+
+def print_report(results: dict, baseline: dict | None) -> None:
+    columns = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+    print(
+        f"{'scenario':<10} {'requests':>9} {'errors':>7} "
+        + " ".join(f"{column:>16}" for column in columns)
+    )
+    for scenario, result in results["scenarios"].items():
+        cells = []
+        for column in columns:
+            cell = f"{result[column]:.1f}"
+            previous = (baseline or {}).get("scenarios", {}).get(scenario)
+            if previous and previous[column]:
+                change = (result[column] - previous[column]) / previous[column]
+                cell += f" ({change:+.0%})"
+            cells.append(f"{cell:>16}")
+        print(
+            f"{scenario:<10} {result['requests']:>9} {result['errors']:>7} "
+            + " ".join(cells)
+        )
+        for stage, timing in result["stages"].items():
+            print(
+                f"  {stage:<8} {timing['count']:>9} "
+                f"p50 {timing['p50_ms']:.2f} ms  p95 {timing['p95_ms']:.2f} ms  "
+                f"p99 {timing['p99_ms']:.2f} ms"
+            )
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from main import app
+    from src.auth.known_emails import known_emails
+    from src.database import Base, engine
+
+    if args.sqlite:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    try:
+        async with app.router.lifespan_context(app):
+            load_test = LoadTest(app, args.users, args.concurrency, args.seconds)
+            await load_test.seed()
+            # Seeded behind the app's back, so the filter has to be refilled
+            # for the logins to find the new accounts.
+            await known_emails.load()
+            scenarios = {
+                scenario: await load_test.run(scenario) for scenario in args.scenarios
+            }
+    finally:
+        # aiosqlite keeps a thread per connection that would block the exit.
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "database": "sqlite" if args.sqlite else "postgresql",
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--sqlite", help="run against this SQLite file instead")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="show changes against a saved baseline")
+    args = parser.parse_args()
+
+    # Settings are read on import, so the environment is prepared first.
+    if args.sqlite:
+        os.environ["DATABASE__URL"] = f"sqlite+aiosqlite:///{args.sqlite}"
+    os.environ.setdefault("LOGIN_RATE_LIMIT__ENABLED", "false")
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
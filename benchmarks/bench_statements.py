@@ -0,0 +1,127 @@
+"""Per-query cost of building ad hoc statements vs the repository's cached ones.
+
+Each query runs against the database from the settings or a SQLite file, with
+the identity map cleared between calls. Run from the project root:
+
+    python -m benchmarks.bench_statements --iterations 2000
+    python -m benchmarks.bench_statements --sqlite bench.db
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from uuid import uuid4
+
+
+def ad_hoc_repository():
+    from sqlalchemy import insert, select
+
+    from src.repositories.base import SQLAlchemyRepository
+
+    class AdHocRepository(SQLAlchemyRepository):
+        # The statements as they were built before the cache: constructed,
+        # cache keyed and looked up again on every call.
+        async def filter_by(self, filter_by):
+            async with self.session() as session:
+                stmt = select(self.model).filter_by(**filter_by)
+                return (await session.execute(stmt)).scalars().first()
+
+        async def create_one(self, create_schema):
+            async with self.session() as session:
+                stmt = (
+                    insert(self.model)
+                    .values(**create_schema.model_dump())
+                    .returning(self.model)
+                )
+                return (await session.execute(stmt)).scalar_one()
+
+    return AdHocRepository
+
+
+async def per_call_us(repository, query, iterations: int) -> float:
+    from src.database import UnitOfWork
+
+    async with UnitOfWork() as uow:
+        target = repository(uow)
+        for _ in range(min(50, iterations)):
+            await query(target)
+            uow.session.expunge_all()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await query(target)
+            uow.session.expunge_all()
+        elapsed = time.perf_counter() - started
+        # Nothing written by the benchmark is kept.
+        await uow.session.rollback()
+    return elapsed / iterations * 1_000_000
+
+
+async def run(args: argparse.Namespace) -> None:
+    from sqlalchemy import delete
+
+    from src.database import Base, UnitOfWork, engine
+    from src.repositories.base import SQLAlchemyRepository
+    from src.users.models import User
+    from src.users.schemas import UserCreate
+
+    prefix = uuid4().hex[:8]
+    try:
+        if args.sqlite:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+        async with UnitOfWork() as uow:
+            users = await SQLAlchemyRepository(User, uow).create_many(
+                [
+                    UserCreate(email=f"{prefix}{idx}@example.com", password="hash")
+                    for idx in range(args.users)
+                ]
+            )
+        emails = [user.email for user in users]
+
+        queries = {
+            "filter_by": lambda repo: repo.filter_by({"email": random.choice(emails)}),
+            "create_one": lambda repo: repo.create_one(
+                UserCreate(email=f"{uuid4().hex[:16]}@example.com", password="hash")
+            ),
+        }
+        repositories = {
+            "ad hoc": lambda uow: ad_hoc_repository()(User, uow),
+            "cached": lambda uow: SQLAlchemyRepository(User, uow),
+        }
+        print(f"{'query':<16} {'ad hoc':>12} {'cached':>12} {'saving':>12}")
+        for name, query in queries.items():
+            timings = {
+                label: await per_call_us(repository, query, args.iterations)
+                for label, repository in repositories.items()
+            }
+            saving = timings["ad hoc"] - timings["cached"]
+            print(
+                f"{name:<16} {timings['ad hoc']:>9.1f} us {timings['cached']:>9.1f} us "
+                f"{saving:>9.1f} us"
+            )
+        async with UnitOfWork() as uow:
+            await uow.session.execute(delete(User).where(User.email.startswith(prefix)))
+    finally:
+        # aiosqlite keeps a thread per connection that would block the exit.
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--sqlite", help="run against this SQLite file instead")
+    args = parser.parse_args()
+
+    # Settings are read on import, so the environment is prepared first.
+    if args.sqlite:
+        os.environ["DATABASE__URL"] = f"sqlite+aiosqlite:///{args.sqlite}"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
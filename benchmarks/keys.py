@@ -0,0 +1,28 @@
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from src.utils.jwt_keys import JWTKeys
+
+PRIVATE_KEY_FACTORIES = {
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "PS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def generate_pem_pair(algorithm: str = "RS256") -> tuple[bytes, bytes]:
+    private_key = PRIVATE_KEY_FACTORIES[algorithm]()
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_pem, public_pem
+
+
+def generate_keys(algorithm: str) -> JWTKeys:
+    return JWTKeys(algorithm, *generate_pem_pair(algorithm))
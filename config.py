@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -7,11 +8,127 @@ BASE_DIR = Path(__file__).parent
 
 
 class AuthJWT(BaseModel):
-    private_key: Path = BASE_DIR / "certs" / "jwt-private.pem"
-    public_key: Path = BASE_DIR / "certs" / "jwt-public.pem"
-    algorithm: str = "RS256"
+    keys_dir: Path = BASE_DIR / "certs"
+    active_key: str | None = None
+    keys_reload_seconds: float = 10
+    algorithm: Literal[
+        "RS256",
+        "RS384",
+        "RS512",
+        "PS256",
+        "PS384",
+        "PS512",
+        "ES256",
+        "ES384",
+        "ES512",
+        "EdDSA",
+    ] = "RS256"
     access_token_expire_minutes: int = 1
     refresh_token_expire_days: int = 30
+    stateless_me: bool = False
+    claims_max_age_seconds: int = 300
+    verified_token_cache_size: int = 10_000
+
+
+class PasswordHashing(BaseModel):
+    executor: Literal["thread", "process"] = "thread"
+    max_workers: int | None = None
+    max_queue_size: int = 64
+    bulk_executor: Literal["thread", "process"] = "process"
+    algorithm: Literal["bcrypt", "argon2id"] = "bcrypt"
+    target_verify_ms: float | None = None
+    calibration_file: Path | None = BASE_DIR / "hashing-calibration.json"
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+
+
+class DatabaseEngine(BaseModel):
+    url: str | None = None
+    replica_urls: list[str] = []
+    replica_selection: Literal["round_robin", "least_connections"] = "round_robin"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    pool_use_lifo: bool = False
+    query_cache_size: int = 500
+    statement_cache_size: int = 100
+    prepared_statement_cache_size: int = 100
+    unique_statement_names: bool = False
+    echo: bool = False
+
+
+class RepositoryCache(BaseModel):
+    enabled: bool = False
+    maxsize: int = 10_000
+    ttl_seconds: float = 60
+
+
+class RevocationStore(BaseModel):
+    backend: Literal["memory", "database"] = "memory"
+    bucket_seconds: float = 60
+    cleanup_interval_seconds: float = 60
+    flush_interval_seconds: float = 1
+    denylist_capacity: int = 100_000
+    denylist_false_positive_rate: float = 0.001
+
+
+class LoginRateLimit(BaseModel):
+    enabled: bool = True
+    ip_limit: int = 20
+    email_limit: int = 5
+    window_seconds: float = 60
+    maxsize: int = 100_000
+    trust_forwarded_for: bool = False
+
+
+class EmailFilter(BaseModel):
+    enabled: bool = True
+    capacity: int = 1_000_000
+    false_positive_rate: float = 0.01
+    sync_interval_seconds: float = 5
+    load_chunk_size: int = 10_000
+
+
+class AuditLog(BaseModel):
+    enabled: bool = True
+    max_queue_size: int = 10_000
+    batch_size: int = 500
+    flush_interval_seconds: float = 1
+    overflow: Literal["drop_oldest", "drop_newest", "block"] = "drop_oldest"
+    block_timeout_seconds: float = 0.05
+
+
+class Introspection(BaseModel):
+    max_tokens: int = 1000
+    parallel_threshold: int = 64
+    executor: Literal["thread", "process"] = "process"
+    max_workers: int | None = None
+    max_queue_size: int = 64
+    max_cache_ttl_seconds: float = 30
+
+
+class Server(BaseModel):
+    mode: Literal["development", "production"] = "development"
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int | None = None
+    loop: Literal["auto", "asyncio", "uvloop"] = "auto"
+    http: Literal["auto", "h11", "httptools"] = "auto"
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    timeout_graceful_shutdown: int | None = 30
+    proxy_headers: bool = True
+
+
+class Profiling(BaseModel):
+    enabled: bool = False
+    slow_request_ms: float = 500
+    interval_ms: float = 5
+    output_dir: Path = BASE_DIR / "profiles"
 
 
 class Settings(BaseSettings):
@@ -22,9 +139,21 @@ class Settings(BaseSettings):
     HOST: str
 
     auth_jwt: AuthJWT = AuthJWT()
+    hashing: PasswordHashing = PasswordHashing()
+    database: DatabaseEngine = DatabaseEngine()
+    repository_cache: RepositoryCache = RepositoryCache()
+    revocation: RevocationStore = RevocationStore()
+    login_rate_limit: LoginRateLimit = LoginRateLimit()
+    email_filter: EmailFilter = EmailFilter()
+    audit_log: AuditLog = AuditLog()
+    introspection: Introspection = Introspection()
+    profiling: Profiling = Profiling()
+    server: Server = Server()
 
     @property
     def database_url(self) -> str:
+        if self.database.url:
+            return self.database.url
         url = "postgresql+asyncpg://{}:{}@{}:{}/{}"
         return url.format(
             self.POSTGRES_USER,
@@ -34,7 +163,7 @@ class Settings(BaseSettings):
             self.POSTGRES_DB,
         )
 
-    model_config = SettingsConfigDict(env_file=".env")
+    model_config = SettingsConfigDict(env_file=".env", env_nested_delimiter="__")
 
 
 settings = Settings()  # pyright: ignore [reportCallIssue]
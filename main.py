@@ -1,13 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+
 import uvicorn
 from fastapi import FastAPI
 
 from src.auth.routers import router as auth_router
+from src.metrics.routers import router as metrics_router
 from src.users.routers import router as users_router
+from config import settings
+from src.auth.audit import audit_log
+from src.auth.denylist import access_denylist
+from src.auth.introspection import introspection_pool
+from src.auth.known_emails import known_emails
+from src.auth.revocation import revocation_store
+from src.server import PreforkServer
+from src.utils.background import background_tasks
+from src.utils.hash_password import (
+    bulk_hash_pool,
+    calibrate_password_hasher,
+    hash_pool,
+    password_hasher,
+)
+from src.utils.jwt_token import JWTToken
+from src.utils.profiling import ProfilingMiddleware, request_profiler
+
+
+def preload() -> None:
+    # Runs in the production server process before workers are forked, and
+    # again on every graceful restart, so workers inherit the results.
+    JWTToken.keyring.load()
+    calibrate_password_hasher()
+
 
-app = FastAPI(title="JWT AUTH API")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await asyncio.to_thread(calibrate_password_hasher)
+    # Precomputes the hash that unknown emails are verified against.
+    await password_hasher().dummy_validate_async("")
+    if settings.email_filter.enabled:
+        await known_emails.load()
+        await known_emails.start()
+    await revocation_store.start()
+    await access_denylist.start()
+    await audit_log.start()
+    tasks: list[asyncio.Task] = []
+    if settings.auth_jwt.keys_reload_seconds:
+        tasks.append(
+            asyncio.create_task(
+                JWTToken.keyring.watch(settings.auth_jwt.keys_reload_seconds)
+            )
+        )
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await background_tasks.drain()
+    await audit_log.close()
+    await access_denylist.close()
+    await revocation_store.close()
+    await known_emails.close()
+    hash_pool.shutdown()
+    bulk_hash_pool.shutdown()
+    introspection_pool.shutdown()
+    request_profiler.stop()
+
+
+app = FastAPI(title="JWT AUTH API", lifespan=lifespan)
 
 app.include_router(users_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
+
+if settings.profiling.enabled:
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
 
 if __name__ == "__main__":
-    uvicorn.run(app="main:app", reload=True, port=8000, host="0.0.0.0")
+    if settings.server.mode == "production":
+        PreforkServer(app, settings.server, preload).run()
+    else:
+        uvicorn.run(
+            app="main:app",
+            reload=True,
+            port=settings.server.port,
+            host=settings.server.host,
+        )
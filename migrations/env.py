@@ -8,6 +8,7 @@ from alembic import context
 from config import settings
 
 
+from src.auth.models import AuthEvent, DeniedToken, RevokedToken
 from src.users.models import User
 from src.database import Base
 
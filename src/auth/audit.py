@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Final, Literal, Type
+
+from sqlalchemy import String
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from config import settings
+from src.repositories.base import RepositoryABC, SQLAlchemyRepository
+from src.utils.metrics import Histogram, metrics
+from .models import AuthEvent
+
+logger = logging.getLogger(__name__)
+
+type AuthEventType = Literal[
+    "register",
+    "login_success",
+    "login_failure",
+    "refresh",
+    "refresh_reuse",
+    "logout",
+]
+
+
+class AuthAuditLog:
+    # Values are cut to the column sizes before they are queued, so that one
+    # long email cannot fail the whole batch it is written with.
+    COLUMN_LENGTHS: Final = {
+        column.name: column.type.length
+        for column in AuthEvent.__table__.c
+        if column.name in ("email", "ip", "detail")
+        and isinstance(column.type, String)
+        and column.type.length is not None
+    }
+    # Errors that blame the database or the connection rather than the row.
+    # Drivers do not all map theirs onto DataError, so a row counts as
+    # rejected whenever the database answered with any other error.
+    UNAVAILABLE_ERRORS: Final = (OperationalError, InterfaceError)
+
+    def __init__(
+        self,
+        repository: Type[RepositoryABC] = SQLAlchemyRepository,
+        enabled: bool = True,
+        max_queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1,
+        overflow: Literal["drop_oldest", "drop_newest", "block"] = "drop_oldest",
+        block_timeout_seconds: float = 0.05,
+    ) -> None:
+        self.repository = repository
+        self.enabled = enabled
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.overflow = overflow
+        self.block_timeout_seconds = block_timeout_seconds
+        self.queue: deque[dict] = deque()
+        self.recorded: int = 0
+        self.written: int = 0
+        self.dropped: int = 0
+        self.rejected: int = 0
+        self.write_errors: int = 0
+        self.flush_seconds = Histogram()
+        self._batch_ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.enabled:
+            # Events bind to the loop that first waits on them.
+            self._batch_ready, self._drained = asyncio.Event(), asyncio.Event()
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            # The writer is not cancelled, which could lose the batch it is
+            # writing; it finishes that and returns.
+            self._stopping.set()
+            self._batch_ready.set()
+            await self._task
+            self._task = None
+        # Whatever is still queued is written before the process exits.
+        while self.queue:
+            if not await self.flush():
+                break
+
+    async def record(
+        self,
+        event: AuthEventType,
+        user_id: int | None = None,
+        email: str | None = None,
+        ip: str | None = None,
+        detail: str | None = None,
+    ) -> None:
+        # Never waits for the database: events are queued and written in
+        # batches by the background writer.
+        if not self.enabled:
+            return
+        row = {
+            "event": event,
+            "user_id": user_id,
+            "email": email,
+            "ip": ip,
+            "detail": detail,
+            "created_at": time.time(),
+        }
+        for name, length in self.COLUMN_LENGTHS.items():
+            if row[name] is not None:
+                row[name] = row[name][:length]
+        if len(self.queue) >= self.max_queue_size and not await self._make_room():
+            self.dropped += 1
+            return
+        self.queue.append(row)
+        self.recorded += 1
+        if len(self.queue) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def _make_room(self) -> bool:
+        if self.overflow == "drop_oldest":
+            self.queue.popleft()
+            self.dropped += 1
+            return True
+        if self.overflow == "block":
+            # Slows the caller down for a bounded time instead of losing the
+            # event straight away.
+            self._batch_ready.set()
+            self._drained.clear()
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._drained.wait(), self.block_timeout_seconds)
+            return len(self.queue) < self.max_queue_size
+        return False
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            with suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._batch_ready.wait(), self.flush_interval_seconds
+                )
+            self._batch_ready.clear()
+            while self.queue and not self._stopping.is_set():
+                if not await self.flush():
+                    # Backs off from a failing database before the retry.
+                    with suppress(TimeoutError):
+                        await asyncio.wait_for(
+                            self._stopping.wait(), self.flush_interval_seconds
+                        )
+                    break
+                if len(self.queue) < self.batch_size:
+                    break
+
+    async def flush(self) -> bool:
+        batch = [
+            self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))
+        ]
+        if not batch:
+            return True
+        started = time.perf_counter()
+        try:
+            await self.repository(AuthEvent).insert_many(batch)
+            written, retry = len(batch), []
+        except asyncio.CancelledError:
+            self._requeue(batch)
+            raise
+        except Exception:
+            self.write_errors += 1
+            logger.exception("Failed to write %d audit events", len(batch))
+            # One bad row must not hold back the rest: they are written one
+            # by one and the rows the database rejects are dropped.
+            written, retry = await self._insert_each(batch)
+        finally:
+            self.flush_seconds.observe(time.perf_counter() - started)
+        self.written += written
+        if retry:
+            # The database itself is failing; the rest waits for the next
+            # attempt.
+            self._requeue(retry)
+            return False
+        self._drained.set()
+        return True
+
+    def _requeue(self, rows: list[dict]) -> None:
+        # Back at the front, as far as newer events leave room for them.
+        room = self.max_queue_size - len(self.queue)
+        self.dropped += max(0, len(rows) - room)
+        self.queue.extendleft(reversed(rows[:room]))
+
+    async def _insert_each(self, batch: list[dict]) -> tuple[int, list[dict]]:
+        written = 0
+        for index, row in enumerate(batch):
+            try:
+                await self.repository(AuthEvent).insert_many([row])
+            except DBAPIError as error:
+                if error.connection_invalidated or isinstance(
+                    error, self.UNAVAILABLE_ERRORS
+                ):
+                    return written, batch[index:]
+                self.rejected += 1
+                logger.warning("Dropped a rejected audit event: %r", row, exc_info=True)
+            except Exception:
+                return written, batch[index:]
+            else:
+                written += 1
+        return written, []
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self.queue),
+            "max_queue_size": self.max_queue_size,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "write_errors": self.write_errors,
+            "flush_seconds": self.flush_seconds.snapshot(),
+        }
+
+
+audit_log = AuthAuditLog(
+    enabled=settings.audit_log.enabled,
+    max_queue_size=settings.audit_log.max_queue_size,
+    batch_size=settings.audit_log.batch_size,
+    flush_interval_seconds=settings.audit_log.flush_interval_seconds,
+    overflow=settings.audit_log.overflow,
+    block_timeout_seconds=settings.audit_log.block_timeout_seconds,
+)
+metrics.register("audit_log", audit_log.stats)
@@ -0,0 +1,49 @@
+import csv
+import json
+from typing import AsyncIterator, Final
+
+CSV_MEDIA_TYPE: Final = "text/csv"
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+
+async def read_records(
+    chunks: AsyncIterator[bytes], media_type: str
+) -> AsyncIterator[tuple[int, dict | None]]:
+    # Yields (line number, record); malformed lines, including ones that are
+    # not valid UTF-8, yield None so that they are reported without aborting
+    # the import.
+    header: list[str] | None = None
+    number = 0
+    async for raw in read_lines(chunks):
+        number += 1
+        try:
+            line = raw.decode()
+        except UnicodeDecodeError:
+            yield number, None
+            continue
+        if not line.strip():
+            continue
+        if media_type == CSV_MEDIA_TYPE:
+            values = next(csv.reader([line]))
+            if header is None:
+                header = values
+                continue
+            record = dict(zip(header, values)) if len(values) == len(header) else None
+        else:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                record = None
+        yield number, record
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from typing import Final
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import settings
+from src.database import async_session_maker
+from src.utils.bloom import BloomFilter
+from src.utils.cache import ExpiringSet
+from src.utils.metrics import metrics
+from .models import DeniedToken
+
+logger = logging.getLogger(__name__)
+
+
+class DenylistStoreABC(ABC):
+    @abstractmethod
+    async def add(self, jti: str, expires_at: float) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def contains(self, jti: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def changes(self, cursor: int) -> tuple[list[str], int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def live(self) -> tuple[list[str], int]:
+        raise NotImplementedError
+
+
+class MemoryDenylistStore(DenylistStoreABC):
+    def __init__(self) -> None:
+        self.denied: ExpiringSet[str] = ExpiringSet()
+
+    async def add(self, jti: str, expires_at: float) -> None:
+        self.denied.add(jti, expires_at)
+
+    async def contains(self, jti: str) -> bool:
+        return jti in self.denied
+
+    async def changes(self, cursor: int) -> tuple[list[str], int]:
+        # Nothing is shared between processes, revocations reach the filter
+        # directly.
+        return [], cursor
+
+    async def live(self) -> tuple[list[str], int]:
+        return list(self.denied), 0
+
+
+class DatabaseDenylistStore(DenylistStoreABC):
+    UPSERT_INSERTS: Final = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+    def __init__(
+        self, session_maker: async_sessionmaker[AsyncSession] = async_session_maker
+    ) -> None:
+        self.session_maker = session_maker
+
+    async def add(self, jti: str, expires_at: float) -> None:
+        async with self.session_maker() as session:
+            dialect_insert = self.UPSERT_INSERTS[session.get_bind().dialect.name]
+            stmt = (
+                dialect_insert(DeniedToken)
+                .values(jti=jti, expires_at=expires_at)
+                .on_conflict_do_nothing()
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+    async def contains(self, jti: str) -> bool:
+        async with self.session_maker() as session:
+            # A replica lagging behind would let a revoked token through.
+            session.sync_session.info["primary"] = True
+            stmt = select(DeniedToken.id).where(DeniedToken.jti == jti)
+            return (await session.execute(stmt)).first() is not None
+
+    async def changes(self, cursor: int) -> tuple[list[str], int]:
+        async with self.session_maker() as session:
+            session.sync_session.info["primary"] = True
+            stmt = (
+                select(DeniedToken.id, DeniedToken.jti)
+                .where(DeniedToken.id > cursor)
+                .order_by(DeniedToken.id)
+            )
+            rows = (await session.execute(stmt)).all()
+        return [jti for _, jti in rows], rows[-1][0] if rows else cursor
+
+    async def live(self) -> tuple[list[str], int]:
+        async with self.session_maker() as session:
+            session.sync_session.info["primary"] = True
+            await session.execute(
+                delete(DeniedToken).where(DeniedToken.expires_at <= time.time())
+            )
+            stmt = select(DeniedToken.id, DeniedToken.jti).order_by(DeniedToken.id)
+            rows = (await session.execute(stmt)).all()
+            await session.commit()
+        return [jti for _, jti in rows], rows[-1][0] if rows else 0
+
+
+class AccessTokenDenylist:
+    def __init__(
+        self,
+        store: DenylistStoreABC,
+        capacity: int = 100_000,
+        false_positive_rate: float = 0.001,
+        sync_interval_seconds: float = 1,
+    ) -> None:
+        self.store = store
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.sync_interval_seconds = sync_interval_seconds
+        self.filter = BloomFilter(capacity, false_positive_rate)
+        self.cursor: int = 0
+        self.checks: int = 0
+        self.filter_positives: int = 0
+        self.false_positives: int = 0
+        self.rebuilds: int = 0
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        await self.rebuild()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        await self.store.add(jti, expires_at)
+        self.filter.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        # Most tokens are not revoked and are answered by the filter alone;
+        # only its positives cost a lookup in the store.
+        self.checks += 1
+        if jti not in self.filter:
+            return False
+        self.filter_positives += 1
+        revoked = await self.store.contains(jti)
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    async def sync(self) -> None:
+        jtis, self.cursor = await self.store.changes(self.cursor)
+        for jti in jtis:
+            self.filter.add(jti)
+        # Expired entries are only dropped by a rebuild, which also keeps the
+        # filter at its false positive rate.
+        if len(self.filter) > self.filter.capacity:
+            await self.rebuild()
+
+    async def rebuild(self) -> None:
+        jtis, cursor = await self.store.live()
+        capacity = self.capacity
+        if len(jtis) > capacity:
+            # Sized with room to spare, so that the next revocations do not
+            # trigger another full rebuild straight away.
+            capacity = 2 * len(jtis)
+            logger.warning(
+                "%d live access token revocations exceed the denylist capacity "
+                "of %d; the filter grows to %d",
+                len(jtis),
+                self.capacity,
+                capacity,
+            )
+        bloom = BloomFilter(capacity, self.false_positive_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        self.filter, self.cursor = bloom, cursor
+        self.rebuilds += 1
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval_seconds)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Failed to sync the access token denylist")
+
+    def stats(self) -> dict:
+        return {
+            **self.filter.stats(),
+            "checks": self.checks,
+            "filter_positives": self.filter_positives,
+            "false_positives": self.false_positives,
+            "rebuilds": self.rebuilds,
+        }
+
+
+def create_denylist() -> AccessTokenDenylist:
+    config = settings.revocation
+    store: DenylistStoreABC = (
+        DatabaseDenylistStore()
+        if config.backend == "database"
+        else MemoryDenylistStore()
+    )
+    return AccessTokenDenylist(
+        store,
+        config.denylist_capacity,
+        config.denylist_false_positive_rate,
+        config.flush_interval_seconds,
+    )
+
+
+access_denylist = create_denylist()
+metrics.register("access_token_denylist", access_denylist.stats)
@@ -1,8 +1,44 @@
-from src.repositories.base import SQLAlchemyRepository
-from src.services.auth import JWTAuthService
+from typing import Annotated, Final, Type
 
-from src.utils.hash_password import Bcrypt
+from fastapi import Depends, HTTPException, Request, status
 
+from src.database import UnitOfWork, get_unit_of_work
+from src.repositories.base import RepositoryABC
+from src.repositories.dependencies import repository_class
+from src.services.auth import AuthABC, JWTAuthService
+from src.users.models import User
+from src.users.schemas import UserRead
+from src.utils.hash_password import password_hasher
 
-def auth_service() -> JWTAuthService:
-    return JWTAuthService(SQLAlchemyRepository, Bcrypt)
+ADMIN_ROLE: Final = "admin"
+SERVICE_ROLE: Final = "service"
+
+
+def auth_service(
+    repository: Annotated[Type[RepositoryABC], Depends(repository_class)],
+    uow: Annotated[UnitOfWork, Depends(get_unit_of_work)],
+) -> JWTAuthService:
+    return JWTAuthService(repository, password_hasher(), uow)
+
+
+async def current_user(
+    request: Request, auth: Annotated[AuthABC, Depends(auth_service)]
+) -> User | UserRead | None:
+    return await auth.authorized(request)
+
+
+async def admin_user(
+    user: Annotated[User | UserRead | None, Depends(current_user)]
+) -> User | UserRead:
+    if user is None or ADMIN_ROLE not in user.roles:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    return user
+
+
+async def introspection_client(
+    user: Annotated[User | UserRead | None, Depends(current_user)]
+) -> User | UserRead:
+    # Gateways call with a service account's token; admins may as well.
+    if user is None or not {ADMIN_ROLE, SERVICE_ROLE} & set(user.roles):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    return user
@@ -0,0 +1,74 @@
+from functools import partial
+
+from jwt.exceptions import InvalidTokenError
+
+from config import settings
+from src.utils.hash_password import HashPool
+from src.utils.jwt_token import JWTToken
+from src.utils.metrics import metrics
+
+
+def decode_token(snapshot: tuple | None, token: str) -> dict | None:
+    # Pool processes hold their own copy of the keyring, which is re-read
+    # when the keys directory the caller saw has changed since.
+    keyring = JWTToken.keyring
+    if snapshot is not None and keyring.snapshot != snapshot:
+        keyring.load()
+    try:
+        return JWTToken.decode(token)
+    except InvalidTokenError:
+        return None
+
+
+class TokenIntrospector:
+    def __init__(
+        self,
+        pool: HashPool,
+        parallel_threshold: int = 64,
+        max_cache_ttl_seconds: float = 30,
+    ) -> None:
+        self.pool = pool
+        self.parallel_threshold = parallel_threshold
+        self.max_cache_ttl_seconds = max_cache_ttl_seconds
+        self.batches: int = 0
+        self.parallel_batches: int = 0
+        self.tokens: int = 0
+
+    async def decode(self, tokens: list[str]) -> list[dict | None]:
+        # Signature checks are CPU bound; small batches are cheaper inline
+        # than the round trip to the pool.
+        self.batches += 1
+        self.tokens += len(tokens)
+        if len(tokens) < self.parallel_threshold:
+            return [decode_token(None, token) for token in tokens]
+        self.parallel_batches += 1
+        snapshot = JWTToken.keyring.snapshot
+        return await self.pool.map(partial(decode_token, snapshot), tokens)
+
+    def cache_ttl(self, exp: float | None, now: float) -> float:
+        # Active tokens are capped so that a gateway notices revocations;
+        # inactive ones never become valid again.
+        if exp is None:
+            return self.max_cache_ttl_seconds
+        return max(0.0, min(exp - now, self.max_cache_ttl_seconds))
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "parallel_batches": self.parallel_batches,
+            "tokens": self.tokens,
+        }
+
+
+introspection_pool = HashPool(
+    settings.introspection.executor,
+    settings.introspection.max_workers,
+    settings.introspection.max_queue_size,
+)
+token_introspector = TokenIntrospector(
+    introspection_pool,
+    settings.introspection.parallel_threshold,
+    settings.introspection.max_cache_ttl_seconds,
+)
+metrics.register("introspection_pool", introspection_pool.stats)
+metrics.register("token_introspector", token_introspector.stats)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from contextlib import suppress
+from datetime import datetime, timedelta
+from multiprocessing.sharedctypes import Synchronized
+from typing import Final
+
+from sqlalchemy import ColumnElement, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import settings
+from src.database import async_session_maker
+from src.users.models import User
+from src.utils.bloom import BloomFilter
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Wall-clock time of the last account change announced by any worker. It is
+# allocated before the prefork server forks, so all workers share it.
+accounts_changed_at: Synchronized = multiprocessing.Value("d", 0.0)
+
+
+class KnownEmails:
+    # Rows are picked up by updated_at, which is set when their transaction
+    # starts; syncs re-read this far back to catch transactions that commit
+    # after a sync has already passed their timestamp.
+    CHANGE_LOOKBACK: Final = timedelta(seconds=60)
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        false_positive_rate: float = 0.01,
+        sync_interval_seconds: float = 5,
+        chunk_size: int = 10_000,
+        session_maker: async_sessionmaker[AsyncSession] = async_session_maker,
+    ) -> None:
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.sync_interval_seconds = sync_interval_seconds
+        self.chunk_size = chunk_size
+        self.session_maker = session_maker
+        self.filter: BloomFilter | None = None
+        self.changed_since: datetime | None = None
+        self.synced_from: float = 0.0
+        self.syncs: int = 0
+        self.negatives: int = 0
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def load(self) -> None:
+        # Built aside and swapped in, so a reload never leaves the filter
+        # empty; the old one still answers while the new one fills up.
+        bloom = BloomFilter(self.capacity, self.false_positive_rate)
+        started = time.time()
+        changed_since = await self._database_now() - self.CHANGE_LOOKBACK
+        await self._add_emails(bloom)
+        self.filter, self.changed_since = bloom, changed_since
+        self.synced_from = started
+
+    def add(self, email: str) -> None:
+        if self.filter is not None:
+            self.filter.add(email)
+        accounts_changed_at.value = time.time()
+
+    def might_exist(self, email: str) -> bool:
+        if self.filter is None or email in self.filter or not self._is_current():
+            return True
+        self.negatives += 1
+        return False
+
+    def _is_current(self) -> bool:
+        # A miss is only final once the filter has been synced recently and
+        # the sync started an interval after the last account change that a
+        # worker announced, which leaves that request time to commit. Until
+        # then misses are left to the database lookup.
+        now = time.time()
+        if now - self.synced_from > 2 * self.sync_interval_seconds:
+            return False
+        return (
+            accounts_changed_at.value <= self.synced_from - self.sync_interval_seconds
+        )
+
+    async def sync(self) -> None:
+        if self.filter is None or self.changed_since is None:
+            return await self.load()
+        started = time.time()
+        changed_since = await self._database_now() - self.CHANGE_LOOKBACK
+        await self._add_emails(self.filter, User.updated_at >= self.changed_since)
+        self.syncs += 1
+        if len(self.filter) > self.capacity:
+            self.capacity *= 2
+            await self.load()
+        else:
+            self.changed_since, self.synced_from = changed_since, started
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval_seconds)
+            if self.filter is None:
+                continue
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Failed to sync known emails")
+
+    async def _database_now(self) -> datetime:
+        # Compared with updated_at, so both come from the database clock.
+        async with self.session_maker() as session:
+            session.sync_session.info["primary"] = True
+            return (await session.execute(select(func.now()))).scalar_one()
+
+    async def _add_emails(
+        self, bloom: BloomFilter, *conditions: ColumnElement[bool]
+    ) -> None:
+        # Read in keyset pages so that neither the driver nor this process
+        # holds the whole users table at once.
+        cursor = 0
+        async with self.session_maker() as session:
+            # Replicas may lag behind the changes being picked up.
+            session.sync_session.info["primary"] = True
+            while True:
+                stmt = (
+                    select(User.id, User.email)
+                    .where(User.id > cursor, *conditions)
+                    .order_by(User.id)
+                    .limit(self.chunk_size)
+                )
+                rows = (await session.execute(stmt)).all()
+                for _, email in rows:
+                    if email not in bloom:
+                        bloom.add(email)
+                if len(rows) < self.chunk_size:
+                    return
+                cursor = rows[-1][0]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.filter is not None,
+            "syncs": self.syncs,
+            "negatives": self.negatives,
+            **(self.filter.stats() if self.filter is not None else {}),
+        }
+
+
+known_emails = KnownEmails(
+    settings.email_filter.capacity,
+    settings.email_filter.false_positive_rate,
+    settings.email_filter.sync_interval_seconds,
+    settings.email_filter.load_chunk_size,
+)
+metrics.register("known_emails", known_emails.stats)
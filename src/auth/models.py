@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database import Base
+
+
+class RevokedToken(Base):
+    key: Mapped[str] = mapped_column(String(64), unique=True)
+    expires_at: Mapped[float] = mapped_column(index=True)
+
+
+class DeniedToken(Base):
+    jti: Mapped[str] = mapped_column(String(32), unique=True)
+    expires_at: Mapped[float] = mapped_column(index=True)
+
+
+class AuthEvent(Base):
+    event: Mapped[str] = mapped_column(String(32))
+    user_id: Mapped[int | None] = mapped_column(BigInteger, index=True)
+    email: Mapped[str | None] = mapped_column(String(40))
+    ip: Mapped[str | None] = mapped_column(String(45))
+    detail: Mapped[str | None] = mapped_column(String(64))
+    created_at: Mapped[float] = mapped_column(index=True)
@@ -0,0 +1,111 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Hashable
+
+from fastapi import HTTPException, Request, status
+
+from config import settings
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+
+
+class RateLimiterBackendABC(ABC):
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        raise NotImplementedError
+
+
+class SlidingWindow:
+    __slots__ = ("start", "current", "previous")
+
+    def __init__(self, start: float) -> None:
+        self.start: float = start
+        self.current: int = 0
+        self.previous: int = 0
+
+
+class MemoryRateLimiterBackend(RateLimiterBackendABC):
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self.windows: TTLCache[Hashable, SlidingWindow] = TTLCache(maxsize)
+
+    async def hit(self, key: str, limit: int, window: float) -> float | None:
+        # Sliding window counter: the previous fixed window is weighted by how
+        # much of it still overlaps, so each key costs three numbers.
+        now = time.monotonic()
+        state = self.windows.get(key) or SlidingWindow(now)
+        elapsed = now - state.start
+        if elapsed >= window:
+            windows_passed = math.floor(elapsed / window)
+            state.previous = state.current if windows_passed == 1 else 0
+            state.current = 0
+            state.start += windows_passed * window
+            elapsed = now - state.start
+
+        estimated = state.previous * (1 - elapsed / window) + state.current
+        if estimated >= limit:
+            return window - elapsed
+        state.current += 1
+        self.windows.set(key, state, ttl=2 * window - elapsed)
+        return None
+
+    def stats(self) -> dict:
+        return {"keys": len(self.windows), "maxsize": self.windows.maxsize}
+
+
+class LoginRateLimiter:
+    def __init__(
+        self,
+        backend: RateLimiterBackendABC,
+        enabled: bool = True,
+        ip_limit: int = 20,
+        email_limit: int = 5,
+        window_seconds: float = 60,
+        trust_forwarded_for: bool = False,
+    ) -> None:
+        self.backend = backend
+        self.enabled = enabled
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.window_seconds = window_seconds
+        self.trust_forwarded_for = trust_forwarded_for
+        self.rejected: int = 0
+
+    def client_ip(self, request: Request) -> str:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if self.trust_forwarded_for and forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+        return request.client.host if request.client else "unknown"
+
+    async def check(self, request: Request, email: str) -> None:
+        if not self.enabled:
+            return
+        for key, limit in (
+            (f"login:ip:{self.client_ip(request)}", self.ip_limit),
+            (f"login:email:{email.lower()}", self.email_limit),
+        ):
+            retry_after = await self.backend.hit(key, limit, self.window_seconds)
+            if retry_after is not None:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, try again later",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+
+    def stats(self) -> dict:
+        stats = {"rejected": self.rejected}
+        if isinstance(self.backend, MemoryRateLimiterBackend):
+            stats.update(self.backend.stats())
+        return stats
+
+
+login_rate_limiter = LoginRateLimiter(
+    MemoryRateLimiterBackend(settings.login_rate_limit.maxsize),
+    settings.login_rate_limit.enabled,
+    settings.login_rate_limit.ip_limit,
+    settings.login_rate_limit.email_limit,
+    settings.login_rate_limit.window_seconds,
+    settings.login_rate_limit.trust_forwarded_for,
+)
+metrics.register("login_rate_limiter", login_rate_limiter.stats)
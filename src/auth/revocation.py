@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from typing import Final
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import settings
+from src.database import async_session_maker
+from src.utils.cache import ExpiringSet
+from src.utils.metrics import metrics
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationStoreABC(ABC):
+    @abstractmethod
+    async def consume(self, jti: str, family: str, expires_at: float) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def revoke(self, family: str, expires_at: float) -> None:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRevocationStore(RevocationStoreABC):
+    def __init__(self, bucket_seconds: float = 60) -> None:
+        self.revoked: ExpiringSet[str] = ExpiringSet(bucket_seconds)
+        self.reuse_detected: int = 0
+
+    async def consume(self, jti: str, family: str, expires_at: float) -> bool:
+        # A refresh token may be exchanged once; presenting it again means
+        # it leaked, so the caller revokes the whole family.
+        if f"family:{family}" in self.revoked:
+            return False
+        if f"jti:{jti}" in self.revoked:
+            self.reuse_detected += 1
+            return False
+        self.revoked.add(f"jti:{jti}", expires_at)
+        return True
+
+    async def revoke(self, family: str, expires_at: float) -> None:
+        self.revoked.add(f"family:{family}", expires_at)
+
+    def stats(self) -> dict:
+        return {"size": len(self.revoked), "reuse_detected": self.reuse_detected}
+
+
+class DatabaseRevocationStore(RevocationStoreABC):
+    UPSERT_INSERTS: Final = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession] = async_session_maker,
+        cleanup_interval_seconds: float = 60,
+    ) -> None:
+        self.session_maker = session_maker
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self.reuse_detected: int = 0
+        self.cleaned_up: int = 0
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def consume(self, jti: str, family: str, expires_at: float) -> bool:
+        # Decided on the primary rather than from a per-worker copy, so a
+        # replayed token is caught whichever worker it reaches. Refreshes are
+        # rare enough for the round trip.
+        async with self.session_maker() as session:
+            session.sync_session.info["primary"] = True
+            stmt = select(RevokedToken.id).where(RevokedToken.key == f"family:{family}")
+            if await session.scalar(stmt) is not None:
+                return False
+            # The unique key lets exactly one of concurrent exchanges insert.
+            consumed = await self._insert(session, f"jti:{jti}", expires_at)
+            await session.commit()
+        if not consumed:
+            self.reuse_detected += 1
+        return consumed
+
+    async def revoke(self, family: str, expires_at: float) -> None:
+        async with self.session_maker() as session:
+            session.sync_session.info["primary"] = True
+            await self._insert(session, f"family:{family}", expires_at)
+            await session.commit()
+
+    async def _insert(self, session: AsyncSession, key: str, expires_at: float) -> bool:
+        dialect_insert = self.UPSERT_INSERTS[session.get_bind().dialect.name]
+        stmt = (
+            dialect_insert(RevokedToken)
+            .values(key=key, expires_at=expires_at)
+            .on_conflict_do_nothing()
+            .returning(RevokedToken.id)
+        )
+        return await session.scalar(stmt) is not None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.cleanup_interval_seconds)
+            try:
+                await self.cleanup()
+            except Exception:
+                logger.exception("Failed to delete expired revocations")
+
+    async def cleanup(self) -> None:
+        async with self.session_maker() as session:
+            result: CursorResult = await session.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at <= time.time())
+            )
+            await session.commit()
+        self.cleaned_up += result.rowcount
+
+    def stats(self) -> dict:
+        return {"reuse_detected": self.reuse_detected, "cleaned_up": self.cleaned_up}
+
+
+def create_revocation_store() -> MemoryRevocationStore | DatabaseRevocationStore:
+    config = settings.revocation
+    if config.backend == "database":
+        return DatabaseRevocationStore(
+            cleanup_interval_seconds=config.cleanup_interval_seconds
+        )
+    return MemoryRevocationStore(config.bucket_seconds)
+
+
+revocation_store = create_revocation_store()
+metrics.register("revocation_store", revocation_store.stats)
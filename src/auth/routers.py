@@ -1,44 +1,87 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Response, Request
+from fastapi import APIRouter, Depends, Response, Request, status
 
 from src.services.auth import AuthABC, JWTAuthService
 from src.users.models import User
-from src.users.schemas import UserSchema
-from .dependencies import auth_service
-from .schemas import UserAuth
+from src.users.schemas import UserRead, UserUpdate
+from src.utils.jwt_token import JWTToken
+from .bulk import read_records
+from .dependencies import admin_user, auth_service, current_user, introspection_client
+from .rate_limit import login_rate_limiter
+from .schemas import IntrospectionRequest, TokenIntrospection, UserAuth
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
-@router.post("/register")
+@router.post("/register", status_code=status.HTTP_201_CREATED)
 async def user_register(
     register_schema: UserAuth, auth: Annotated[AuthABC, Depends(auth_service)]
-):
+) -> dict:
     return await auth.register(register_schema)
 
 
+@router.post("/register/bulk", dependencies=[Depends(admin_user)])
+async def user_register_bulk(
+    request: Request, auth: Annotated[AuthABC, Depends(auth_service)]
+) -> dict:
+    # The body is parsed while it streams in: NDJSON by default, or CSV with
+    # an email,password header when sent as text/csv.
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    return await auth.register_many(read_records(request.stream(), media_type))
+
+
 @router.post("/login")
 async def user_login(
+    request: Request,
     response: Response,
     login_schema: UserAuth,
     auth: Annotated[AuthABC, Depends(auth_service)],
 ) -> dict:
-    return await auth.authenticate(login_schema, response)
+    # Throttled before the attempt costs a query or a password verification.
+    await login_rate_limiter.check(request, login_schema.email)
+    return await auth.authenticate(
+        login_schema, response, login_rate_limiter.client_ip(request)
+    )
 
 
-@router.get("/me", response_model=UserSchema | None)
+@router.get("/me", response_model=UserRead | None)
 async def user_me(
-    request: Request, user: Annotated[AuthABC, Depends(auth_service)]
-) -> User | None:
-    return await user.authorized(request)
+    user: Annotated[User | UserRead | None, Depends(current_user)]
+) -> User | UserRead | None:
+    return user
+
+
+@router.patch("/users/{idx}", dependencies=[Depends(admin_user)])
+async def user_update(
+    idx: int,
+    update_schema: UserUpdate,
+    auth: Annotated[AuthABC, Depends(auth_service)],
+) -> dict:
+    return await auth.update_user(idx, update_schema.model_dump(exclude_none=True))
 
 
 @router.post("/logout")
 async def user_logout(
-    response: Response, auth: Annotated[AuthABC, Depends(auth_service)]
+    request: Request,
+    response: Response,
+    auth: Annotated[AuthABC, Depends(auth_service)],
 ) -> dict:
-    return await auth.logout(response)
+    return await auth.logout(request, response)
+
+
+@router.post("/introspect", dependencies=[Depends(introspection_client)])
+async def introspect(
+    introspection: IntrospectionRequest,
+    auth: Annotated[AuthABC, Depends(auth_service)],
+) -> dict[str, list[TokenIntrospection]]:
+    # For gateways: many access tokens per call, answered in request order.
+    return {"results": await auth.introspect(introspection.tokens)}
+
+
+@router.get("/.well-known/jwks.json")
+async def jwks() -> dict:
+    return JWTToken.keyring.jwks()
 
 
 @router.get("/refresh-jwt-token")
@@ -1,9 +1,9 @@
-from pydantic import BaseModel
+from typing import Annotated, Literal
 
-from typing import Literal
-
-from pydantic import BaseModel
+from annotated_types import MaxLen
+from pydantic import BaseModel, EmailStr
 
+from config import settings
 from src.users.schemas import UserCreate
 
 
@@ -16,3 +16,20 @@ class Payload(BaseModel):
     exp: float
     iat: float
     token_type: Literal["access", "refresh"]
+    email: EmailStr | None = None
+    roles: list[str] = []
+    ver: int | None = None
+    claims_iat: float | None = None
+    jti: str | None = None
+    fam: str | None = None
+
+
+class IntrospectionRequest(BaseModel):
+    tokens: Annotated[list[str], MaxLen(settings.introspection.max_tokens)]
+
+
+class TokenIntrospection(BaseModel):
+    active: bool
+    claims: Payload | None = None
+    error: str | None = None
+    cache_ttl: float
@@ -1,12 +1,155 @@
-from typing import AsyncGenerator
+import itertools
+import os
+import time
+from typing import Any, AsyncGenerator, Literal, cast
+from uuid import uuid4
 
-from sqlalchemy import BigInteger
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped, declared_attr
+from sqlalchemy import BigInteger, Engine, Integer, exc, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Session,
+    mapped_column,
+    Mapped,
+    declared_attr,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from config import settings, DatabaseEngine
+from src.utils.metrics import Histogram, metrics
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkout_seconds = Histogram()
+        self.timeouts: int = 0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        # Covers both waiting for a free connection and opening a new one.
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.checkout_seconds.observe(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "timeouts": self.timeouts,
+            "checkout_seconds": self.checkout_seconds.snapshot(),
+        }
+
+
+def engine_options(url: str, config: DatabaseEngine) -> dict:
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.pool_size,
+        "max_overflow": config.max_overflow,
+        "pool_timeout": config.pool_timeout,
+        "pool_recycle": config.pool_recycle,
+        "pool_pre_ping": config.pool_pre_ping,
+        "pool_use_lifo": config.pool_use_lifo,
+        "query_cache_size": config.query_cache_size,
+        "echo": config.echo,
+    }
+    if make_url(url).get_driver_name() == "asyncpg":
+        connect_args: dict[str, Any] = {
+            "statement_cache_size": config.statement_cache_size,
+            "prepared_statement_cache_size": config.prepared_statement_cache_size,
+        }
+        if config.unique_statement_names:
+            # Needed behind PgBouncer in transaction mode, where numbered
+            # statement names collide between server connections.
+            connect_args["prepared_statement_name_func"] = (
+                lambda: f"__asyncpg_{uuid4()}__"
+            )
+        options["connect_args"] = connect_args
+    return options
 
-from config import settings
 
-engine = create_async_engine(url=settings.database_url)
+def create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(url, **engine_options(url, settings.database))
+
+
+def engine_pool(engine: AsyncEngine) -> InstrumentedQueuePool:
+    # Engines made by create_engine always use the instrumented pool.
+    return cast(InstrumentedQueuePool, engine.pool)
+
+
+class EngineRouter:
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: list[AsyncEngine],
+        selection: Literal["round_robin", "least_connections"] = "round_robin",
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self.selection = selection
+        self._counter = itertools.count()
+
+    def reader(self) -> AsyncEngine:
+        if not self.replicas:
+            return self.primary
+        if self.selection == "least_connections":
+            return min(
+                self.replicas, key=lambda replica: engine_pool(replica).checkedout()
+            )
+        return self.replicas[next(self._counter) % len(self.replicas)]
+
+    def stats(self) -> dict:
+        return {
+            f"replica_{index}": engine_pool(replica).stats()
+            for index, replica in enumerate(self.replicas)
+        }
+
+
+engine = create_engine(settings.database_url)
+engine_router = EngineRouter(
+    engine,
+    [create_engine(url) for url in settings.database.replica_urls],
+    settings.database.replica_selection,
+)
+
+
+def reset_pools_after_fork() -> None:
+    # A forked worker must not reuse connections opened by its parent;
+    # close=False leaves them to the parent and gives the worker fresh pools.
+    for each in (engine_router.primary, *engine_router.replicas):
+        each.sync_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=reset_pools_after_fork)
+metrics.register("db_pool", lambda: engine_pool(engine).stats())
+metrics.register("db_replica_pools", engine_router.stats)
+
+
+class RoutingSession(Session):
+    router: EngineRouter = engine_router
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        # Writes, flushes and everything after them in the same session go to
+        # the primary so that a request always reads its own writes.
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["primary"] = True
+        if clause is None or self.info.get("primary"):
+            return self.router.primary.sync_engine
+
+        if "replica" not in self.info:
+            self.info["replica"] = self.router.reader()
+        return self.info["replica"].sync_engine
 
 
 class Base(DeclarativeBase):
@@ -16,14 +159,46 @@ class Base(DeclarativeBase):
     def __tablename__(self) -> str:
         return self.__name__.lower() + "s"
 
-    id: Mapped[int] = mapped_column(primary_key=True, type_=BigInteger)
+    # SQLite only autoincrements INTEGER primary keys; used for local stand-ins.
+    id: Mapped[int] = mapped_column(
+        primary_key=True, type_=BigInteger().with_variant(Integer, "sqlite")
+    )
 
 
 async_session_maker = async_sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
+    class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False
 )
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
+
+
+class UnitOfWork:
+    # Set when the unit of work is entered.
+    session: AsyncSession
+
+    def __init__(
+        self, session_maker: async_sessionmaker[AsyncSession] = async_session_maker
+    ) -> None:
+        self.session_maker = session_maker
+
+    async def __aenter__(self) -> "UnitOfWork":
+        # A connection is only checked out once the session runs a statement.
+        self.session = self.session_maker()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                await self.session.commit()
+            else:
+                await self.session.rollback()
+        finally:
+            await self.session.close()
+
+
+async def get_unit_of_work() -> AsyncGenerator[UnitOfWork, None]:
+    async with UnitOfWork() as uow:
+        yield uow
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.utils.metrics import metrics
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/json")
+async def get_metrics_json() -> dict:
+    return metrics.collect()
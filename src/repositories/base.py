@@ -1,60 +1,374 @@
 from abc import ABC, abstractmethod
-from typing import List, Type
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Final, Hashable, List, Sequence, Type
 
 from pydantic import BaseModel
-from sqlalchemy import insert, select
-from sqlalchemy.engine import Result
+from sqlalchemy import (
+    ColumnElement,
+    Executable,
+    Select,
+    bindparam,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import CursorResult, Result
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 
-from src.database import async_session_maker, Base
+from src.database import async_session_maker, Base, UnitOfWork
+from src.utils.metrics import metrics, stage_timers
 
 
 class RepositoryABC[T: Base, C: BaseModel](ABC):
     @abstractmethod
-    def __init__(self, model: Type[T]) -> None:
+    def __init__(self, model: Type[T], uow: UnitOfWork | None = None) -> None:
         raise NotImplementedError
 
     @abstractmethod
     async def get_all(self) -> List[T]:
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_page(self, after_id: int | None, limit: int) -> List[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_all(self, after_id: int | None, batch_size: int) -> AsyncIterator[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_page_rows(
+        self, columns: Sequence[str], after_id: int | None, limit: int
+    ) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_rows(
+        self, columns: Sequence[str], after_id: int | None, batch_size: int
+    ) -> AsyncIterator[dict]:
+        raise NotImplementedError
+
     @abstractmethod
     async def get_one_by_id(self, idx: int) -> T | None:
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_row_by_id(self, columns: Sequence[str], idx: int) -> dict | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_rows_by_ids(
+        self, columns: Sequence[str], ids: Sequence[int]
+    ) -> List[dict]:
+        raise NotImplementedError
+
     @abstractmethod
     async def create_one(self, create_schema: C) -> T:
         raise NotImplementedError
 
+    @abstractmethod
+    async def create_if_absent(self, create_schema: C) -> T | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_many(self, create_schemas: List[C]) -> List[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_many(self, values: List[dict]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_by(self, filter_by: dict, values: dict) -> int:
+        raise NotImplementedError
+
     @abstractmethod
     async def filter_by(self, filter_by: dict) -> T | None:
         raise NotImplementedError
 
 
 class SQLAlchemyRepository[T: Base, C: BaseModel](RepositoryABC[T, C]):
-    def __init__(self, model: Type[T]) -> None:
+    UPSERT_INSERTS: Final = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+    # Statements are built once per model and query shape and then executed
+    # with new parameters. This only saves the Python-side cost of building
+    # the statement on every call: SQLAlchemy's compiled cache and asyncpg's
+    # prepared statements serve ad hoc statements of the same shape as well.
+    statements: dict[Hashable, Executable] = {}
+
+    def __init__(self, model: Type[T], uow: UnitOfWork | None = None) -> None:
         self.model = model
+        self.uow = uow
 
+    @classmethod
+    def stats(cls) -> dict:
+        return {"statements": len(cls.statements)}
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        if self.uow is not None:
+            yield self.uow.session
+            return
+        async with UnitOfWork() as uow:
+            yield uow.session
+
+    def _stream_session(self) -> AsyncSession:
+        if self.uow is not None:
+            return self.uow.session_maker()
+        return async_session_maker()
+
+    @stage_timers.timed("db.get_all")
     async def get_all(self) -> List[T]:
-        async with async_session_maker() as session:
-            stmt = select(self.model).order_by(self.model.id)
+        async with self.session() as session:
+            stmt = self._statement(
+                "get_all", build=lambda: select(self.model).order_by(self.model.id)
+            )
             result: Result = await session.execute(stmt)
             return list(result.scalars().all())
 
+    @stage_timers.timed("db.get_page")
+    async def get_page(self, after_id: int | None = None, limit: int = 100) -> List[T]:
+        async with self.session() as session:
+            stmt = self._statement(
+                "get_page",
+                after_id is not None,
+                build=lambda: self._paged(select(self.model), after_id),
+            )
+            result: Result = await session.execute(
+                stmt, {"after_id": after_id, "limit": limit}
+            )
+            return list(result.scalars().all())
+
+    async def stream_all(
+        self, after_id: int | None = None, batch_size: int = 1000
+    ) -> AsyncIterator[T]:
+        # Streams are consumed after the request's unit of work has finished,
+        # so they always hold a session of their own.
+        async with self._stream_session() as session:
+            stmt = self._statement(
+                "stream_all",
+                after_id is not None,
+                batch_size,
+                build=lambda: self._streamed(select(self.model), after_id, batch_size),
+            )
+            async for entity in await session.stream_scalars(
+                stmt, {"after_id": after_id}
+            ):
+                yield entity
+
+    @stage_timers.timed("db.get_page_rows")
+    async def get_page_rows(
+        self, columns: Sequence[str], after_id: int | None = None, limit: int = 100
+    ) -> List[dict]:
+        async with self.session() as session:
+            stmt = self._statement(
+                "get_page_rows",
+                tuple(columns),
+                after_id is not None,
+                build=lambda: self._paged(self._select_columns(columns), after_id),
+            )
+            result: Result = await session.execute(
+                stmt, {"after_id": after_id, "limit": limit}
+            )
+            return [dict(row) for row in result.mappings()]
+
+    async def stream_rows(
+        self,
+        columns: Sequence[str],
+        after_id: int | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[dict]:
+        async with self._stream_session() as session:
+            stmt = self._statement(
+                "stream_rows",
+                tuple(columns),
+                after_id is not None,
+                batch_size,
+                build=lambda: self._streamed(
+                    self._select_columns(columns), after_id, batch_size
+                ),
+            )
+            async for row in (
+                await session.stream(stmt, {"after_id": after_id})
+            ).mappings():
+                yield dict(row)
+
+    @stage_timers.timed("db.get_one_by_id")
     async def get_one_by_id(self, idx: int) -> T | None:
-        async with async_session_maker() as session:
+        async with self.session() as session:
             return await session.get(self.model, idx)
 
+    @stage_timers.timed("db.get_row_by_id")
+    async def get_row_by_id(self, columns: Sequence[str], idx: int) -> dict | None:
+        async with self.session() as session:
+            stmt = self._statement(
+                "get_row_by_id",
+                tuple(columns),
+                build=lambda: self._select_columns(columns).where(
+                    self.model.id == bindparam("id")
+                ),
+            )
+            row = (await session.execute(stmt, {"id": idx})).mappings().first()
+            return dict(row) if row is not None else None
+
+    @stage_timers.timed("db.get_rows_by_ids")
+    async def get_rows_by_ids(
+        self, columns: Sequence[str], ids: Sequence[int]
+    ) -> List[dict]:
+        async with self.session() as session:
+            stmt = self._statement(
+                "get_rows_by_ids",
+                tuple(columns),
+                build=lambda: self._select_columns(columns).where(
+                    self.model.id.in_(bindparam("ids", expanding=True))
+                ),
+            )
+            result = await session.execute(stmt, {"ids": list(ids)})
+            return [dict(row) for row in result.mappings()]
+
+    @stage_timers.timed("db.create_one")
     async def create_one(self, create_schema: C) -> T:
-        async with async_session_maker() as session:
-            stmt = (
-                insert(self.model).values(**create_schema.dict()).returning(self.model)
+        async with self.session() as session:
+            # The inserted columns come from the parameters, so one statement
+            # serves every schema.
+            stmt = self._statement(
+                "create_one", build=lambda: insert(self.model).returning(self.model)
             )
-            result: Result = await session.execute(stmt)
-            await session.commit()
+            result: Result = await session.execute(stmt, create_schema.model_dump())
             return result.scalar_one()
 
+    @stage_timers.timed("db.create_if_absent")
+    async def create_if_absent(self, create_schema: C) -> T | None:
+        async with self.session() as session:
+            # Without a conflict target every unique constraint of the model
+            # counts, so a duplicate is skipped instead of raising.
+            stmt = self._upsert(session, "create_if_absent", returning=True)
+            result: Result = await session.execute(stmt, create_schema.model_dump())
+            return result.scalar_one_or_none()
+
+    @stage_timers.timed("db.create_many")
+    async def create_many(self, create_schemas: List[C]) -> List[T]:
+        if not create_schemas:
+            return []
+        async with self.session() as session:
+            # A list of parameters makes this an executemany, sent in
+            # multi-row VALUES pages; rows that already exist are skipped and
+            # only the inserted ones come back.
+            stmt = self._upsert(session, "create_many", returning=True)
+            result = await session.scalars(
+                stmt, [create_schema.model_dump() for create_schema in create_schemas]
+            )
+            return list(result.all())
+
+    @stage_timers.timed("db.insert_many")
+    async def insert_many(self, values: List[dict]) -> None:
+        if not values:
+            return
+        async with self.session() as session:
+            # Nothing is returned, so the driver can send the rows in its
+            # cheapest executemany form.
+            stmt = self._statement("insert_many", build=lambda: insert(self.model))
+            await session.execute(stmt, values)
+
+    @stage_timers.timed("db.update_by")
+    async def update_by(self, filter_by: dict, values: dict) -> int:
+        async with self.session() as session:
+            if None in filter_by.values() or any(
+                isinstance(value, ColumnElement) for value in values.values()
+            ):
+                # "= NULL" never matches, so IS NULL needs a statement of its
+                # own, as do SQL expressions such as a counter increment.
+                stmt = update(self.model).filter_by(**filter_by).values(**values)
+                result: CursorResult = await session.execute(stmt)
+                return result.rowcount
+            stmt = self._statement(
+                "update_by",
+                tuple(filter_by),
+                tuple(values),
+                build=lambda: update(self.model)
+                .where(*self._matches(filter_by, prefix="where_"))
+                .values({column: bindparam(f"set_{column}") for column in values})
+                .returning(self.model.id)
+                .execution_options(synchronize_session=False),
+            )
+            ids = (
+                await session.execute(
+                    stmt,
+                    {
+                        **{f"where_{col}": value for col, value in filter_by.items()},
+                        **{f"set_{col}": value for col, value in values.items()},
+                    },
+                )
+            ).scalars()
+            # ORM synchronization cannot read bound parameters, so matching
+            # objects already in the session are brought up to date here.
+            identity_map = session.sync_session.identity_map
+            updated = 0
+            for idx in ids:
+                updated += 1
+                instance = identity_map.get(identity_key(self.model, idx))
+                if instance is not None:
+                    for column, value in values.items():
+                        set_committed_value(instance, column, value)
+            return updated
+
+    @stage_timers.timed("db.filter_by")
     async def filter_by(self, filter_by: dict) -> T | None:
-        async with async_session_maker() as session:
-            stmt = select(self.model).filter_by(**filter_by)
-            result: Result = await session.execute(stmt)
+        async with self.session() as session:
+            if None in filter_by.values():
+                stmt = select(self.model).filter_by(**filter_by)
+                result: Result = await session.execute(stmt)
+                return result.scalars().first()
+            stmt = self._statement(
+                "filter_by",
+                tuple(filter_by),
+                build=lambda: select(self.model).where(*self._matches(filter_by)),
+            )
+            result = await session.execute(stmt, filter_by)
             return result.scalars().first()
+
+    def _statement(
+        self, *shape: Hashable, build: Callable[[], Executable]
+    ) -> Executable:
+        key = (self.model, *shape)
+        stmt = self.statements.get(key)
+        if stmt is None:
+            stmt = self.statements[key] = build()
+        return stmt
+
+    def _upsert(self, session: AsyncSession, name: str, returning: bool) -> Executable:
+        dialect = session.get_bind().dialect.name
+
+        def build() -> Executable:
+            stmt = self.UPSERT_INSERTS[dialect](self.model).on_conflict_do_nothing()
+            return stmt.returning(self.model) if returning else stmt
+
+        return self._statement(name, dialect, build=build)
+
+    def _matches(self, filter_by: dict, prefix: str = "") -> list:
+        return [
+            getattr(self.model, column) == bindparam(f"{prefix}{column}")
+            for column in filter_by
+        ]
+
+    def _paged(self, stmt: Select, after_id: int | None) -> Select:
+        stmt = stmt.order_by(self.model.id).limit(bindparam("limit"))
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > bindparam("after_id"))
+        return stmt
+
+    def _streamed(self, stmt: Select, after_id: int | None, batch_size: int) -> Select:
+        stmt = stmt.order_by(self.model.id).execution_options(yield_per=batch_size)
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > bindparam("after_id"))
+        return stmt
+
+    def _select_columns(self, columns: Sequence[str]) -> Select:
+        # Plain column rows skip the identity map and never load the columns
+        # a response does not show.
+        return select(*(getattr(self.model, column) for column in columns))
+
+
+metrics.register("repository_statements", SQLAlchemyRepository.stats)
@@ -0,0 +1,145 @@
+from typing import AsyncIterator, Hashable, List, Sequence, Type
+
+from pydantic import BaseModel
+
+from config import settings
+from src.database import Base, UnitOfWork
+from src.utils.cache import TTLCache
+from src.utils.metrics import metrics
+from .base import RepositoryABC, SQLAlchemyRepository
+
+
+class CachedRepository[T: Base, C: BaseModel](RepositoryABC[T, C]):
+    repository_class: Type[RepositoryABC] = SQLAlchemyRepository
+    caches: dict[type, TTLCache[Hashable, Base]] = {}
+
+    def __init__(self, model: Type[T], uow: UnitOfWork | None = None) -> None:
+        self.model = model
+        self.repository: RepositoryABC[T, C] = self.repository_class(model, uow)
+        self.cache: TTLCache[Hashable, T] = self.cache_for(model)
+        self.unique_columns: tuple[str, ...] = tuple(
+            column.name for column in model.__table__.columns if column.unique
+        )
+
+    @classmethod
+    def cache_for(cls, model: type) -> TTLCache:
+        if model not in cls.caches:
+            cls.caches[model] = TTLCache(
+                maxsize=settings.repository_cache.maxsize,
+                ttl=settings.repository_cache.ttl_seconds,
+            )
+        return cls.caches[model]
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {model.__name__: cache.stats() for model, cache in cls.caches.items()}
+
+    async def get_all(self) -> List[T]:
+        return await self.repository.get_all()
+
+    async def get_page(self, after_id: int | None = None, limit: int = 100) -> List[T]:
+        return await self.repository.get_page(after_id, limit)
+
+    def stream_all(
+        self, after_id: int | None = None, batch_size: int = 1000
+    ) -> AsyncIterator[T]:
+        return self.repository.stream_all(after_id, batch_size)
+
+    async def get_page_rows(
+        self, columns: Sequence[str], after_id: int | None = None, limit: int = 100
+    ) -> List[dict]:
+        return await self.repository.get_page_rows(columns, after_id, limit)
+
+    def stream_rows(
+        self,
+        columns: Sequence[str],
+        after_id: int | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[dict]:
+        return self.repository.stream_rows(columns, after_id, batch_size)
+
+    async def get_row_by_id(self, columns: Sequence[str], idx: int) -> dict | None:
+        cached: T | None = self.cache.get(("id", idx))
+        if cached is not None:
+            return {column: getattr(cached, column) for column in columns}
+        return await self.repository.get_row_by_id(columns, idx)
+
+    async def get_rows_by_ids(
+        self, columns: Sequence[str], ids: Sequence[int]
+    ) -> List[dict]:
+        return await self.repository.get_rows_by_ids(columns, ids)
+
+    async def get_one_by_id(self, idx: int) -> T | None:
+        result: T | None = self.cache.get(("id", idx))
+        if result is None:
+            result = await self.repository.get_one_by_id(idx)
+            self._remember(result)
+        return result
+
+    async def create_one(self, create_schema: C) -> T:
+        result: T = await self.repository.create_one(create_schema)
+        self._forget(result)
+        return result
+
+    async def create_if_absent(self, create_schema: C) -> T | None:
+        result: T | None = await self.repository.create_if_absent(create_schema)
+        if result is not None:
+            self._forget(result)
+        return result
+
+    async def create_many(self, create_schemas: List[C]) -> List[T]:
+        result: List[T] = await self.repository.create_many(create_schemas)
+        for entity in result:
+            self._forget(entity)
+        return result
+
+    async def insert_many(self, values: List[dict]) -> None:
+        # Lookups that missed are not cached, so new rows need no eviction.
+        await self.repository.insert_many(values)
+
+    async def update_by(self, filter_by: dict, values: dict) -> int:
+        count: int = await self.repository.update_by(filter_by, values)
+        cached: T | None = (
+            self.cache.get(("id", filter_by["id"])) if "id" in filter_by else None
+        )
+        if cached is not None:
+            self._forget(cached)
+        elif count:
+            self.cache.clear()
+        return count
+
+    async def filter_by(self, filter_by: dict) -> T | None:
+        key = self._unique_key(filter_by)
+        if key is None:
+            return await self.repository.filter_by(filter_by)
+
+        result: T | None = self.cache.get(key)
+        if result is None:
+            result = await self.repository.filter_by(filter_by)
+            self._remember(result)
+        return result
+
+    def _unique_key(self, filter_by: dict) -> tuple | None:
+        if len(filter_by) != 1:
+            return None
+        ((column, value),) = filter_by.items()
+        if column == "id" or column in self.unique_columns:
+            return column, value
+        return None
+
+    def _keys(self, entity: T) -> list[tuple]:
+        keys = [("id", entity.id)]
+        keys.extend((column, getattr(entity, column)) for column in self.unique_columns)
+        return keys
+
+    def _remember(self, entity: T | None) -> None:
+        if entity is not None:
+            for key in self._keys(entity):
+                self.cache.set(key, entity)
+
+    def _forget(self, entity: T) -> None:
+        for key in self._keys(entity):
+            self.cache.pop(key)
+
+
+metrics.register("repository_cache", CachedRepository.stats)
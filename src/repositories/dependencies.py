@@ -0,0 +1,11 @@
+from typing import Type
+
+from config import settings
+from .base import RepositoryABC, SQLAlchemyRepository
+from .cached import CachedRepository
+
+
+def repository_class() -> Type[RepositoryABC]:
+    if settings.repository_cache.enabled:
+        return CachedRepository
+    return SQLAlchemyRepository
@@ -0,0 +1,191 @@
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Final
+
+import uvicorn
+from starlette.types import ASGIApp
+
+from config import Server, settings
+
+logger = logging.getLogger(__name__)
+
+
+class PreforkServer:
+    POLL_SECONDS: Final = 0.2
+    RESPAWN_DELAY_SECONDS: Final = 1.0
+    KILL_MARGIN_SECONDS: Final = 5.0
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: Server,
+        preload: Callable[[], None] | None = None,
+    ) -> None:
+        self.app = app
+        self.config = config
+        self.preload = preload
+        self.worker_count: int = config.workers or os.cpu_count() or 1
+        self.workers: set[int] = set()
+        self.retiring: set[int] = set()
+        self.signals: list[int] = []
+        self.socket: socket.socket | None = None
+
+    def uvicorn_config(self) -> uvicorn.Config:
+        # "auto" picks uvloop and httptools when they are installed.
+        return uvicorn.Config(
+            self.app,
+            host=self.config.host,
+            port=self.config.port,
+            loop=self.config.loop,
+            http=self.config.http,
+            backlog=self.config.backlog,
+            timeout_keep_alive=self.config.timeout_keep_alive,
+            timeout_graceful_shutdown=self.config.timeout_graceful_shutdown,
+            proxy_headers=self.config.proxy_headers,
+            lifespan="on",
+        )
+
+    def check_shared_state(self) -> None:
+        # Revocations, the denylist and rate limits live in process memory by
+        # default, which only holds together with a single worker.
+        if self.worker_count == 1:
+            return
+        if settings.revocation.backend == "memory":
+            raise RuntimeError(
+                f"{self.worker_count} workers cannot share the memory revocation "
+                "backend: a refresh token replayed to another worker would be "
+                "accepted and logouts would not reach the other workers. Set "
+                "REVOCATION__BACKEND=database or SERVER__WORKERS=1."
+            )
+        if settings.login_rate_limit.enabled:
+            logger.warning(
+                "Login attempts are counted per worker, so clients get up to %d "
+                "times the configured limits",
+                self.worker_count,
+            )
+
+    def run(self) -> None:
+        self.check_shared_state()
+        # The listening socket lives in this process, so connections queue up
+        # in its backlog while workers are being replaced.
+        self.socket = self.uvicorn_config().bind_socket()
+        self.socket.listen(self.config.backlog)
+        if self.preload is not None:
+            self.preload()
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._handle_signal)
+        for _ in range(self.worker_count):
+            self.spawn()
+        logger.info(
+            "Serving on %s:%d with %d workers",
+            self.config.host,
+            self.config.port,
+            self.worker_count,
+        )
+
+        while True:
+            self.reap()
+            if not self.signals:
+                time.sleep(self.POLL_SECONDS)
+                continue
+            signum = self.signals.pop(0)
+            if signum == signal.SIGHUP:
+                self.restart()
+            else:
+                self.stop()
+                break
+        self.socket.close()
+
+    def spawn(self) -> int:
+        if self.socket is None:
+            raise RuntimeError("Workers are spawned once the socket is bound")
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return pid
+
+        exit_code = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            uvicorn.Server(self.uvicorn_config()).run(sockets=[self.socket])
+        except SystemExit as error:
+            exit_code = error.code if isinstance(error.code, int) else 1
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def restart(self) -> None:
+        # New workers start accepting from the shared socket before the old
+        # ones are told to stop; those finish their in-flight requests first.
+        logger.info("Restarting %d workers", len(self.workers))
+        if self.preload is not None:
+            try:
+                self.preload()
+            except Exception:
+                logger.exception("Preload failed, keeping the current workers")
+                return
+        old = set(self.workers)
+        self.workers.clear()
+        for _ in range(self.worker_count):
+            self.spawn()
+        self.terminate(old)
+
+    def stop(self) -> None:
+        self.terminate(set(self.workers))
+        self.workers.clear()
+        deadline = (
+            time.monotonic()
+            + (self.config.timeout_graceful_shutdown or 0)
+            + self.KILL_MARGIN_SECONDS
+        )
+        while self.retiring and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(self.POLL_SECONDS)
+        for pid in self.retiring:
+            logger.warning("Killing worker %d after the graceful timeout", pid)
+            self._kill(pid, signal.SIGKILL)
+        while self.retiring:
+            self.reap()
+            time.sleep(self.POLL_SECONDS)
+
+    def terminate(self, pids: set[int]) -> None:
+        self.retiring |= pids
+        for pid in pids:
+            self._kill(pid, signal.SIGTERM)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif pid in self.workers:
+                self.workers.discard(pid)
+                logger.error(
+                    "Worker %d exited unexpectedly (status %d), respawning",
+                    pid,
+                    status,
+                )
+                # Keeps a worker that fails on startup from spinning the CPU.
+                time.sleep(self.RESPAWN_DELAY_SECONDS)
+                self.spawn()
+
+    def _handle_signal(self, signum: int, frame) -> None:
+        self.signals.append(signum)
+
+    @staticmethod
+    def _kill(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
@@ -1,17 +1,32 @@
 import datetime
+import hashlib
+import logging
 from abc import ABC, abstractmethod
-from typing import Type, Literal, Final
+from typing import AsyncIterator, Type, Literal, Final
 
 from fastapi import HTTPException, status, Response, Request
 from jwt.exceptions import InvalidTokenError
+from pydantic import ValidationError
 
-from src.auth.schemas import UserAuth, Payload
+from config import settings
+from src.auth.audit import AuthAuditLog, audit_log
+from src.auth.known_emails import known_emails
+from src.auth.denylist import AccessTokenDenylist, access_denylist
+from src.auth.rate_limit import login_rate_limiter
+from src.auth.revocation import RevocationStoreABC, revocation_store
+from src.auth.introspection import TokenIntrospector, token_introspector
+from src.auth.schemas import UserAuth, Payload, TokenIntrospection
+from src.database import UnitOfWork, async_session_maker
 from src.repositories.base import RepositoryABC
 from src.users.models import User
-from src.users.schemas import UserSchema
-from src.utils.hash_password import HashPasswordABC
+from src.users.schemas import UserRead
+from src.utils.background import background_tasks
+from src.utils.hash_password import HashPasswordABC, HashPoolOverloadedError
 from src.utils.jwt_token import JWTToken
-from .base import Service
+from src.utils.token_cache import verified_tokens
+from .users import UserService
+
+logger = logging.getLogger(__name__)
 
 
 class AuthValidatorABC(ABC):
@@ -32,73 +47,273 @@ class AuthValidator(AuthValidatorABC):
         schema: UserAuth,
         repository: RepositoryABC[User, UserAuth],
     ) -> tuple[bool, User | None]:
+        if not known_emails.might_exist(schema.email):
+            return await validator.dummy_validate_async(schema.password), None
         user: User | None = await repository.filter_by({"email": schema.email})
         if not user:
-            return False, None
+            return await validator.dummy_validate_async(schema.password), None
         password: str = schema.password
         hash_password: str = user.password
-        return validator.validate_password(password, hash_password), user
+        return await validator.validate_password_async(password, hash_password), user
 
 
 class AuthABC(ABC):
     @abstractmethod
-    async def register(self, schema: UserAuth) -> None:
+    async def register(self, schema: UserAuth) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def register_many(
+        self, records: AsyncIterator[tuple[int, dict | None]]
+    ) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def authenticate(
+        self, schema: UserAuth, response: Response, ip: str | None = None
+    ) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def authorized(self, request: Request) -> User | UserRead | None:
         raise NotImplementedError
 
     @abstractmethod
-    async def authenticate(self, schema: UserAuth, response: Response) -> dict:
+    async def update_user(self, idx: int, values: dict) -> dict:
         raise NotImplementedError
 
     @abstractmethod
-    async def authorized(self, request: Request) -> User | None:
+    async def logout(self, request: Request, response: Response) -> dict:
         raise NotImplementedError
 
     @abstractmethod
-    async def logout(self, response: Response) -> dict:
+    async def introspect(self, tokens: list[str]) -> list[TokenIntrospection]:
         raise NotImplementedError
 
 
-class JWTAuthService(AuthABC, Service[User, UserSchema, UserAuth]):
+class JWTAuthService(AuthABC, UserService[UserAuth]):
     COOKIE_ACCESS_TOKEN_KEY: Final = "access_token"
     COOKIE_REFRESH_TOKEN_KEY: Final = "refresh_token"
+    BULK_BATCH_SIZE: Final = 1000
+    # Columns carried in token claims or proving the user's identity.
+    VERSIONED_COLUMNS: Final = frozenset({"email", "roles", "password"})
 
     def __init__(
         self,
         repository: Type[RepositoryABC[User, UserAuth]],
         validator: Type[HashPasswordABC],
+        uow: UnitOfWork | None = None,
+        revocations: RevocationStoreABC = revocation_store,
+        denylist: AccessTokenDenylist = access_denylist,
+        introspector: TokenIntrospector = token_introspector,
+        audit: AuthAuditLog = audit_log,
     ):
-        super().__init__(User, repository)
+        super().__init__(repository, uow)
         self.validator: Type[HashPasswordABC] = validator
         self.jwt: Type[JWTToken] = JWTToken
+        self.repository_class: Type[RepositoryABC[User, UserAuth]] = repository
+        self.session_maker = (
+            uow.session_maker if uow is not None else async_session_maker
+        )
+        self.revocations: RevocationStoreABC = revocations
+        self.denylist: AccessTokenDenylist = denylist
+        self.introspector: TokenIntrospector = introspector
+        self.audit: AuthAuditLog = audit
 
-    async def register(self, schema: UserAuth) -> None:
-        schema.password = self.validator.hash_password(schema.password)
-        await self.create({"email": schema.email}, schema)
-        raise HTTPException(status_code=status.HTTP_201_CREATED)
+    async def register(self, schema: UserAuth) -> dict:
+        try:
+            schema.password = await self.validator.hash_password_async(schema.password)
+        except HashPoolOverloadedError:
+            raise self._overloaded_exception()
+        user: User = await self.create(schema)
+        await self.audit.record("register", user.id, schema.email)
+        return {"message": "Registration successful"}
 
-    async def authenticate(self, schema: UserAuth, response: Response) -> dict:
-        is_success, user = await AuthValidator.validate_user_password(
-            self.validator, schema, self.repository
-        )
+    async def register_many(
+        self, records: AsyncIterator[tuple[int, dict | None]]
+    ) -> dict:
+        results: list[dict] = []
+        seen: set[str] = set()
+        batch: list[tuple[int, UserAuth]] = []
+        async for line, record in records:
+            try:
+                schema = UserAuth.model_validate(record)
+            except ValidationError as error:
+                message = error.errors()[0]["msg"] if record else "Malformed row"
+                results.append({"line": line, "status": "invalid", "detail": message})
+                continue
+            if schema.email in seen:
+                results.append({"line": line, "status": "duplicate"})
+                continue
+            seen.add(schema.email)
+            batch.append((line, schema))
+            if len(batch) >= self.BULK_BATCH_SIZE:
+                results.extend(await self._register_batch(batch))
+                batch = []
+        if batch:
+            results.extend(await self._register_batch(batch))
+
+        results.sort(key=lambda result: result["line"])
+        counts = {"created": 0, "duplicate": 0, "invalid": 0, "failed": 0}
+        for result in results:
+            counts[result["status"]] += 1
+        return {**counts, "results": results}
+
+    async def _register_batch(self, batch: list[tuple[int, UserAuth]]) -> list[dict]:
+        # Every batch commits on a session of its own: one that fails is
+        # reported line by line, and the batches before it are kept.
+        try:
+            hashed = await self.validator.hash_passwords_async(
+                schema.password for _, schema in batch
+            )
+            for (_, schema), password in zip(batch, hashed):
+                schema.password = password
+            async with UnitOfWork(self.session_maker) as uow:
+                created = await self.repository_class(User, uow).create_many(
+                    [schema for _, schema in batch]
+                )
+        except HashPoolOverloadedError:
+            return self._failed(batch, "Server is busy, try again later")
+        except Exception:
+            logger.exception("Failed to register a batch of %d users", len(batch))
+            return self._failed(batch, "Registration failed")
+
+        ids = {user.email: user.id for user in created}
+        for email, idx in ids.items():
+            known_emails.add(email)
+            await self.audit.record("register", idx, email, detail="bulk")
+        return [
+            (
+                {"line": line, "status": "created", "id": ids[schema.email]}
+                if schema.email in ids
+                else {"line": line, "status": "duplicate"}
+            )
+            for line, schema in batch
+        ]
+
+    @staticmethod
+    def _failed(batch: list[tuple[int, UserAuth]], detail: str) -> list[dict]:
+        return [
+            {"line": line, "status": "failed", "detail": detail} for line, _ in batch
+        ]
+
+    async def authenticate(
+        self, schema: UserAuth, response: Response, ip: str | None = None
+    ) -> dict:
+        try:
+            is_success, user = await AuthValidator.validate_user_password(
+                self.validator, schema, self.repository
+            )
+        except HashPoolOverloadedError:
+            raise self._overloaded_exception()
         if not is_success or not user:
+            await self.audit.record(
+                "login_failure", user.id if user else None, schema.email, ip
+            )
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        if self.validator.needs_rehash(user.password):
+            background_tasks.spawn(
+                self._rehash_password(user.id, user.password, schema.password)
+            )
 
         access_token: str = self.jwt.create_access_token(user)
         refresh_token: str = self.jwt.create_refresh_token(user)
 
         response.set_cookie(self.COOKIE_ACCESS_TOKEN_KEY, access_token, httponly=True)
         response.set_cookie(self.COOKIE_REFRESH_TOKEN_KEY, refresh_token, httponly=True)
+        await self.audit.record("login_success", user.id, user.email, ip)
         return {"message": "Login successful"}
 
-    async def authorized(self, request: Request) -> User | None:
+    async def _rehash_password(self, idx: int, old_hash: str, password: str) -> None:
+        # Runs after the response on a session of its own; matching the old
+        # hash keeps a concurrent password change from being overwritten.
+        # Shares the bounded interactive pool with logins, never the bulk
+        # import pool; when it is full the next login tries again.
+        try:
+            new_hash = await self.validator.hash_password_async(password)
+        except HashPoolOverloadedError:
+            return
+        await self.repository_class(User).update_by(
+            {"id": idx, "password": old_hash}, {"password": new_hash}
+        )
+
+    async def authorized(self, request: Request) -> User | UserRead | None:
         access_token: str | None = request.cookies.get(self.COOKIE_ACCESS_TOKEN_KEY)
         if not access_token:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
-        payload = self._verify_token(access_token, "access")
-        return await self.repository.get_one_by_id(payload.sub)
+        payload = await self._verify_token(access_token, "access")
+        if settings.auth_jwt.stateless_me:
+            claimed_user: UserRead | None = self._user_from_claims(payload)
+            if claimed_user is not None:
+                return claimed_user
+        user: User | None = await self.repository.get_one_by_id(payload.sub)
+        if user is not None and not self._version_matches(payload, user.version):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Token outdated"
+            )
+        return user
 
-    async def logout(self, response: Response) -> dict:
+    async def update_user(self, idx: int, values: dict) -> dict:
+        # A new version outdates every token issued before the change: they
+        # can no longer be refreshed, and their claims are not trusted.
+        if not values:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Nothing to update",
+            )
+        values = dict(values)
+        if "email" in values:
+            owner: User | None = await self.repository.filter_by(
+                {"email": values["email"]}
+            )
+            if owner is not None and owner.id != idx:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="User already exists",
+                )
+        if "password" in values:
+            try:
+                values["password"] = await self.validator.hash_password_async(
+                    values["password"]
+                )
+            except HashPoolOverloadedError:
+                raise self._overloaded_exception()
+        if self.VERSIONED_COLUMNS & values.keys():
+            values["version"] = User.version + 1
+        if not await self.repository.update_by({"id": idx}, values):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+        if "email" in values:
+            known_emails.add(values["email"])
+        return {"message": "User updated"}
+
+    async def logout(self, request: Request, response: Response) -> dict:
+        user_id: int | None = None
+        access_token: str | None = request.cookies.get(self.COOKIE_ACCESS_TOKEN_KEY)
+        if access_token:
+            try:
+                payload = await self._verify_token(access_token, "access")
+            except HTTPException:
+                payload = None
+            if payload is not None:
+                user_id = payload.sub
+            if payload is not None and payload.jti:
+                await self.denylist.revoke(payload.jti, payload.exp)
+        refresh_token: str | None = request.cookies.get(self.COOKIE_REFRESH_TOKEN_KEY)
+        if refresh_token:
+            try:
+                payload = await self._verify_token(refresh_token, "refresh")
+            except HTTPException:
+                payload = None
+            if payload is not None:
+                user_id = payload.sub
+            if payload is not None and payload.fam:
+                await self.revocations.revoke(payload.fam, payload.exp)
+        if user_id is not None:
+            ip = login_rate_limiter.client_ip(request)
+            await self.audit.record("logout", user_id, ip=ip)
         response.delete_cookie(self.COOKIE_ACCESS_TOKEN_KEY)
         response.delete_cookie(self.COOKIE_REFRESH_TOKEN_KEY)
         return {"message": "Logout successful"}
@@ -110,31 +325,184 @@ class JWTAuthService(AuthABC, Service[User, UserSchema, UserAuth]):
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Refresh token not provided",
             )
-        payload = self._verify_token(refresh_token, "refresh")
-        payload.token_type = "access"
-        new_access_token: str = self.jwt.create_access_token(old_payload=payload)
+        payload = await self._verify_token(refresh_token, "refresh")
+        # Tokens issued before rotation existed carry no jti. They are consumed
+        # under a digest of the token, which also names the family of the
+        # tokens they are swapped for, so a replay revokes those as well.
+        if not payload.jti or not payload.fam:
+            digest = hashlib.blake2b(refresh_token.encode(), digest_size=16).hexdigest()
+            payload.jti = payload.jti or f"legacy:{digest}"
+            payload.fam = payload.fam or digest
+        if not await self.revocations.consume(payload.jti, payload.fam, payload.exp):
+            await self.revocations.revoke(payload.fam, payload.exp)
+            await self.audit.record(
+                "refresh_reuse",
+                payload.sub,
+                payload.email,
+                login_rate_limiter.client_ip(request),
+                detail=payload.fam,
+            )
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Refresh token revoked",
+            )
+        # Every refresh re-reads the user, so the new tokens carry current
+        # claims, and tokens from before a version bump are turned away.
+        user: User | None = await self.repository.get_one_by_id(payload.sub)
+        if user is None or not self._version_matches(payload, user.version):
+            await self.revocations.revoke(payload.fam, payload.exp)
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Token outdated"
+            )
+        new_refresh_token: str = self.jwt.rotate_refresh_token(payload, user)
+        new_access_token: str = self.jwt.create_access_token(user)
         response.set_cookie(
             self.COOKIE_ACCESS_TOKEN_KEY, new_access_token, httponly=True
         )
+        response.set_cookie(
+            self.COOKIE_REFRESH_TOKEN_KEY, new_refresh_token, httponly=True
+        )
+        await self.audit.record(
+            "refresh", user.id, user.email, login_rate_limiter.client_ip(request)
+        )
         return {"message": "Access token refreshed"}
 
-    def _verify_token(
-        self, token: str, token_type: Literal["access", "refresh"]
-    ) -> Payload:
+    async def introspect(self, tokens: list[str]) -> list[TokenIntrospection]:
+        # Cached verifications are reused; the rest are decoded together, in
+        # the introspection pool when the batch is large.
+        payloads: list[Payload | None] = [
+            verified_tokens.get(token) for token in tokens
+        ]
+        missing = [index for index, payload in enumerate(payloads) if payload is None]
         try:
-            payload: Payload = Payload(**self.jwt.decode(token))
-        except InvalidTokenError:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token"
+            decoded = await self.introspector.decode([tokens[i] for i in missing])
+        except HashPoolOverloadedError:
+            raise self._overloaded_exception()
+        for index, claims in zip(missing, decoded):
+            try:
+                payload = Payload(**claims) if claims is not None else None
+            except ValidationError:
+                payload = None
+            if payload is not None:
+                verified_tokens.set(tokens[index], payload)
+                payloads[index] = payload
+
+        errors: list[str | None] = [
+            (
+                await self._payload_error(payload, "access")
+                if payload is not None
+                else "Invalid token"
+            )
+            for payload in payloads
+        ]
+        # As for /auth/me, claims are trusted while they are fresh; older ones
+        # must match the user's current version.
+        stale = {
+            payload.sub
+            for payload, error in zip(payloads, errors)
+            if payload is not None
+            and error is None
+            and not self._claims_are_fresh(payload)
+        }
+        if stale:
+            rows = await self.repository.get_rows_by_ids(
+                ("id", "version"), sorted(stale)
             )
+            versions = {row["id"]: row["version"] for row in rows}
+            for index, payload in enumerate(payloads):
+                if (
+                    payload is not None
+                    and errors[index] is None
+                    and not self._claims_are_fresh(payload)
+                    and (
+                        payload.sub not in versions
+                        or not self._version_matches(payload, versions[payload.sub])
+                    )
+                ):
+                    errors[index] = "Token outdated"
+
+        now = datetime.datetime.now(datetime.UTC).timestamp()
+        results: list[TokenIntrospection] = []
+        for payload, error in zip(payloads, errors):
+            claims = payload if error is None else None
+            results.append(
+                TokenIntrospection(
+                    active=claims is not None,
+                    claims=claims,
+                    error=error,
+                    cache_ttl=self.introspector.cache_ttl(
+                        claims.exp if claims is not None else None, now
+                    ),
+                )
+            )
+        return results
+
+    @staticmethod
+    def _claims_are_fresh(payload: Payload) -> bool:
+        if payload.email is None or payload.ver is None or payload.claims_iat is None:
+            return False
+        claims_age = (
+            datetime.datetime.now(datetime.UTC).timestamp() - payload.claims_iat
+        )
+        return claims_age <= settings.auth_jwt.claims_max_age_seconds
+
+    @classmethod
+    def _user_from_claims(cls, payload: Payload) -> UserRead | None:
+        if payload.email is None or payload.ver is None:
+            return None
+        if not cls._claims_are_fresh(payload):
+            return None
+        return UserRead(
+            id=payload.sub,
+            email=payload.email,
+            roles=payload.roles,
+            version=payload.ver,
+        )
+
+    @staticmethod
+    def _version_matches(payload: Payload, version: int) -> bool:
+        # Tokens issued before versions were introduced carry none.
+        return payload.ver is None or payload.ver == version
 
+    @staticmethod
+    def _overloaded_exception() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+    async def _verify_token(
+        self, token: str, token_type: Literal["access", "refresh"]
+    ) -> Payload:
+        payload: Payload | None = verified_tokens.get(token)
+        if payload is None:
+            try:
+                payload = Payload(**self.jwt.decode(token))
+            except InvalidTokenError:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token"
+                )
+            verified_tokens.set(token, payload)
+
+        error = await self._payload_error(payload, token_type)
+        if error is not None:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=error)
+        return payload
+
+    async def _payload_error(
+        self, payload: Payload, token_type: Literal["access", "refresh"]
+    ) -> str | None:
         if (
             not payload.exp
             or payload.token_type != token_type
             or payload.exp < datetime.datetime.now(datetime.UTC).timestamp()
         ):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Token expired or invalid"
-            )
-
-        return payload
+            return "Token expired or invalid"
+        if (
+            token_type == "access"
+            and payload.jti
+            and await self.denylist.is_revoked(payload.jti)
+        ):
+            return "Token revoked"
+        return None
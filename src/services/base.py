@@ -1,16 +1,16 @@
 from abc import ABC, abstractmethod
-from typing import List, Type
+from typing import AsyncIterator, Final, List, Sequence, Type
 
 from fastapi import HTTPException, status
 from pydantic import BaseModel
 
-from src.database import Base
+from src.database import Base, UnitOfWork
 from src.repositories.base import RepositoryABC
 
 
 class ServiceABC[T: Base, S: BaseModel, C: BaseModel](ABC):
     @abstractmethod
-    async def create(self, filter_by: dict, create_schema: C) -> T:
+    async def create(self, create_schema: C) -> T:
         raise NotImplementedError
 
     @abstractmethod
@@ -21,16 +21,47 @@ class ServiceABC[T: Base, S: BaseModel, C: BaseModel](ABC):
     async def all(self) -> List[T]:
         raise NotImplementedError
 
+    @abstractmethod
+    async def page(self, after_id: int | None, limit: int) -> List[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream(self, after_id: int | None) -> AsyncIterator[T]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def one_row(self, columns: Sequence[str], idx: int) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def page_rows(
+        self, columns: Sequence[str], after_id: int | None, limit: int
+    ) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_rows(
+        self, columns: Sequence[str], after_id: int | None
+    ) -> AsyncIterator[dict]:
+        raise NotImplementedError
+
 
 class Service[T: Base, S: BaseModel, C: BaseModel](ServiceABC):
-    def __init__(self, model: Type[T], repository: Type[RepositoryABC[T, C]]):
+    STREAM_BATCH_SIZE: Final = 1000
+
+    def __init__(
+        self,
+        model: Type[T],
+        repository: Type[RepositoryABC[T, C]],
+        uow: UnitOfWork | None = None,
+    ):
         self.model: Type[T] = model
-        self.repository: RepositoryABC[T, C] = repository(model)
+        self.repository: RepositoryABC[T, C] = repository(model, uow)
 
-    async def create(self, filter_by: dict, create_schema: C) -> T:
-        result: T | None = await self.repository.filter_by(filter_by)
-        if not result:
-            return await self.repository.create_one(create_schema)
+    async def create(self, create_schema: C) -> T:
+        result: T | None = await self.repository.create_if_absent(create_schema)
+        if result:
+            return result
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"{self.model.__name__} already exists",
@@ -47,3 +78,28 @@ class Service[T: Base, S: BaseModel, C: BaseModel](ServiceABC):
 
     async def all(self) -> list[T]:
         return await self.repository.get_all()
+
+    async def page(self, after_id: int | None = None, limit: int = 100) -> List[T]:
+        return await self.repository.get_page(after_id, limit)
+
+    def stream(self, after_id: int | None = None) -> AsyncIterator[T]:
+        return self.repository.stream_all(after_id, self.STREAM_BATCH_SIZE)
+
+    async def one_row(self, columns: Sequence[str], idx: int) -> dict:
+        result: dict | None = await self.repository.get_row_by_id(columns, idx)
+        if result:
+            return result
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{self.model.__name__} not found",
+        )
+
+    async def page_rows(
+        self, columns: Sequence[str], after_id: int | None = None, limit: int = 100
+    ) -> List[dict]:
+        return await self.repository.get_page_rows(columns, after_id, limit)
+
+    def stream_rows(
+        self, columns: Sequence[str], after_id: int | None = None
+    ) -> AsyncIterator[dict]:
+        return self.repository.stream_rows(columns, after_id, self.STREAM_BATCH_SIZE)
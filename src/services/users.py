@@ -0,0 +1,23 @@
+from typing import Type
+
+from pydantic import BaseModel
+
+from src.auth.known_emails import known_emails
+from src.database import UnitOfWork
+from src.repositories.base import RepositoryABC
+from src.users.models import User
+from src.users.schemas import UserSchema
+from .base import Service
+
+
+class UserService[C: BaseModel](Service[User, UserSchema, C]):
+    def __init__(
+        self, repository: Type[RepositoryABC[User, C]], uow: UnitOfWork | None = None
+    ):
+        super().__init__(User, repository, uow)
+
+    async def create(self, create_schema: C) -> User:
+        user: User = await super().create(create_schema)
+        # Logins on this worker must not be turned away by the filter.
+        known_emails.add(user.email)
+        return user
@@ -1,9 +1,17 @@
-from src.repositories.base import SQLAlchemyRepository
-from src.services.base import Service
+from typing import Annotated, Type
 
-from .models import User
-from .schemas import UserCreate, UserSchema
+from fastapi import Depends
 
+from src.database import UnitOfWork, get_unit_of_work
+from src.repositories.base import RepositoryABC
+from src.repositories.dependencies import repository_class
+from src.services.users import UserService
 
-def user_service() -> Service[User, UserSchema, UserCreate]:
-    return Service[User, UserSchema, UserCreate](User, SQLAlchemyRepository)
+from .schemas import UserCreate
+
+
+def user_service(
+    repository: Annotated[Type[RepositoryABC], Depends(repository_class)],
+    uow: Annotated[UnitOfWork, Depends(get_unit_of_work)],
+) -> UserService[UserCreate]:
+    return UserService[UserCreate](repository, uow)
@@ -1,4 +1,6 @@
-from sqlalchemy import String
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database import Base
@@ -7,3 +9,13 @@ from src.database import Base
 class User(Base):
     email: Mapped[str] = mapped_column(String(40), unique=True)
     password: Mapped[str]
+    roles: Mapped[list[str]] = mapped_column(JSON, default=list, server_default="[]")
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+    # Set by the database on insert and update; the known emails filter
+    # picks up changes by this column.
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        index=True,
+    )
@@ -1,32 +1,55 @@
-from typing import List, Annotated
+from typing import AsyncIterator, Final, List, Annotated
 
-from fastapi import APIRouter, Depends
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from src.services.base import ServiceABC
 from .dependencies import user_service
 from .models import User
-from .schemas import UserSchema, UserCreate
+from .schemas import UserCreate, UserRead, UserSchema
 
 router = APIRouter(prefix="/users", tags=["Users"])
 type user_service_type = ServiceABC[User, UserSchema, UserCreate]
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Read endpoints select only these columns and hand the rows straight to
+# orjson; response_model is kept for the OpenAPI schema.
+USER_READ_COLUMNS: Final = tuple(UserRead.model_fields)
 
-@router.get("/", response_model=List[UserSchema])
-async def get_all(
-    user: Annotated[user_service_type, Depends(user_service)]
-) -> List[User]:
-    return await user.all()
+
+async def ndjson_lines(rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for row in rows:
+        yield orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
 
 
-@router.get("/{idx}", response_model=UserSchema)
+@router.get("/", response_model=List[UserRead])
+async def get_all(
+    request: Request,
+    user: Annotated[user_service_type, Depends(user_service)],
+    after_id: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+) -> ORJSONResponse | StreamingResponse:
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            ndjson_lines(user.stream_rows(USER_READ_COLUMNS, after_id)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    rows = await user.page_rows(USER_READ_COLUMNS, after_id, limit)
+    headers = {"X-Next-Cursor": str(rows[-1]["id"])} if len(rows) == limit else None
+    return ORJSONResponse(rows, headers=headers)
+
+
+@router.get("/{idx}", response_model=UserRead)
 async def get_one(
     idx: int, user: Annotated[user_service_type, Depends(user_service)]
-) -> User:
-    return await user.one(idx)
+) -> ORJSONResponse:
+    return ORJSONResponse(await user.one_row(USER_READ_COLUMNS, idx))
 
 
 @router.post("/create", response_model=UserSchema)
 async def create_one(
     create_schema: UserCreate, user: Annotated[user_service_type, Depends(user_service)]
 ) -> User:
-    return await user.create({"email": create_schema.email}, create_schema)
+    return await user.create(create_schema)
@@ -18,3 +18,18 @@ class UserCreate(BaseModel):
 
 class UserSchema(UserGet, UserCreate):
     pass
+
+
+class UserUpdate(BaseModel):
+    email: EmailStr | None = None
+    password: Annotated[str, MinLen(3)] | None = None
+    roles: list[str] | None = None
+
+
+class UserRead(UserGet):
+    email: EmailStr
+    roles: list[str] = []
+    version: int = 1
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,36 @@
+import asyncio
+import logging
+from typing import Coroutine
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTasks:
+    def __init__(self) -> None:
+        self.tasks: set[asyncio.Task] = set()
+        self.failed: int = 0
+
+    def spawn(self, coroutine: Coroutine) -> None:
+        # The event loop only keeps weak references to tasks.
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task) -> None:
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
+            logger.error("Background task failed", exc_info=task.exception())
+
+    async def drain(self) -> None:
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"running": len(self.tasks), "failed": self.failed}
+
+
+background_tasks = BackgroundTasks()
+metrics.register("background_tasks", background_tasks.stats)
@@ -0,0 +1,52 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, false_positive_rate: float = 0.001) -> None:
+        self.capacity: int = max(capacity, 1)
+        self.false_positive_rate: float = false_positive_rate
+        self.size: int = max(
+            8,
+            math.ceil(
+                -self.capacity * math.log(false_positive_rate) / math.log(2) ** 2
+            ),
+        )
+        self.hashes: int = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count: int = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def _positions(self, key: str) -> list[int]:
+        # Double hashing: k positions from the two halves of a single digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def estimated_false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "memory_bytes": len(self._bits),
+            "target_false_positive_rate": self.false_positive_rate,
+            "estimated_false_positive_rate": self.estimated_false_positive_rate(),
+        }
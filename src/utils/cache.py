@@ -0,0 +1,97 @@
+import heapq
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterator
+
+
+class TTLCache[K: Hashable, V]:
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: float | None = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = math.inf if ttl is None else time.monotonic() + ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ExpiringSet[K: Hashable]:
+    def __init__(self, bucket_seconds: float = 60) -> None:
+        self.bucket_seconds: float = bucket_seconds
+        self._expires_at: dict[K, float] = {}
+        self._buckets: dict[int, set[K]] = {}
+        self._bucket_heap: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
+
+    def __contains__(self, key: K) -> bool:
+        expires_at = self._expires_at.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def __iter__(self) -> Iterator[K]:
+        now = time.time()
+        return (key for key, exp in list(self._expires_at.items()) if exp > now)
+
+    def add(self, key: K, expires_at: float) -> None:
+        # Entries are grouped by expiry so that purging only ever touches
+        # buckets that are already over, keeping adds and lookups O(1).
+        self.purge()
+        if expires_at <= time.time() or self._expires_at.get(key, 0) >= expires_at:
+            return
+        self._expires_at[key] = expires_at
+        bucket = int(expires_at // self.bucket_seconds)
+        if bucket not in self._buckets:
+            self._buckets[bucket] = set()
+            heapq.heappush(self._bucket_heap, bucket)
+        self._buckets[bucket].add(key)
+
+    def purge(self) -> None:
+        now = time.time()
+        current = int(now // self.bucket_seconds)
+        while self._bucket_heap and self._bucket_heap[0] < current:
+            for key in self._buckets.pop(heapq.heappop(self._bucket_heap)):
+                if self._expires_at.get(key, math.inf) <= now:
+                    del self._expires_at[key]
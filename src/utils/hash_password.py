@@ -1,12 +1,125 @@
+import asyncio
+import json
+import logging
+import os
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from uuid import uuid4
+from typing import TYPE_CHECKING, Callable, Final, Iterable, Literal, Type
 
 import bcrypt
 
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+if TYPE_CHECKING:
+    from argon2 import PasswordHasher
+
+from config import settings
+from .metrics import metrics, stage_timers
+
+logger = logging.getLogger(__name__)
+
+
+class HashPoolOverloadedError(Exception):
+    pass
+
+
+def map_chunk[A, R](func: Callable[[A], R], items: list[A]) -> list[R]:
+    return [func(item) for item in items]
+
+
+class HashPool:
+    def __init__(
+        self,
+        executor: Literal["thread", "process"] = "thread",
+        max_workers: int | None = None,
+        max_queue_size: int = 64,
+    ) -> None:
+        self.executor_type = executor
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.max_queue_size: int = max_queue_size
+        self.pending: int = 0
+        self.rejected: int = 0
+        self._executor: Executor | None = None
+
+    @property
+    def executor(self) -> Executor:
+        # Created lazily so that forked workers never inherit a live pool.
+        if self._executor is None:
+            executor_class = (
+                ProcessPoolExecutor
+                if self.executor_type == "process"
+                else ThreadPoolExecutor
+            )
+            self._executor = executor_class(max_workers=self.max_workers)
+        return self._executor
+
+    async def run[R](self, func: Callable[..., R], *args) -> R:
+        if self.pending >= self.max_workers + self.max_queue_size:
+            self.rejected += 1
+            raise HashPoolOverloadedError("Password hashing queue is full")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def map[A, R](self, func: Callable[[A], R], items: Iterable[A]) -> list[R]:
+        # One job per worker instead of one per item keeps both the queue and,
+        # for process pools, the pickling overhead small.
+        items = list(items)
+        size = -(-len(items) // self.max_workers) or 1
+        chunks = [items[start : start + size] for start in range(0, len(items), size)]
+        results = await asyncio.gather(
+            *(self.run(map_chunk, func, chunk) for chunk in chunks)
+        )
+        return [result for chunk in results for result in chunk]
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hash_pool = HashPool(
+    settings.hashing.executor,
+    settings.hashing.max_workers,
+    settings.hashing.max_queue_size,
+)
+# Bulk imports get a pool of their own so they cannot starve logins.
+bulk_hash_pool = HashPool(
+    settings.hashing.bulk_executor,
+    settings.hashing.max_workers,
+    settings.hashing.max_queue_size,
+)
+metrics.register("hash_pool", hash_pool.stats)
+metrics.register("bulk_hash_pool", bulk_hash_pool.stats)
+
 
 class HashPasswordABC(ABC):
+    PREFIXES: tuple[str, ...] = ()
+    parameters: dict = {}
+    calibrated: bool = False
+    dummy_hash: str | None = None
+
     @staticmethod
     @abstractmethod
-    def hash_password(password: str) -> str:
+    def hash_password(password: str, **parameters) -> str:
         raise NotImplementedError
 
     @staticmethod
@@ -14,12 +127,202 @@ class HashPasswordABC(ABC):
     def validate_password(password: str, hashed_password) -> bool:
         raise NotImplementedError
 
+    @classmethod
+    @abstractmethod
+    def needs_rehash(cls, hashed_password: str) -> bool:
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    def calibrate(cls, target_seconds: float) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def identify(cls, hashed_password: str) -> Type["HashPasswordABC"]:
+        # Hashes made by another algorithm stay valid until they are upgraded.
+        for hasher in PASSWORD_HASHERS.values():
+            if hashed_password.startswith(hasher.PREFIXES):
+                return hasher
+        return cls
+
+    @classmethod
+    def hasher(cls) -> Callable[[str], str]:
+        # Parameters travel with the call, so process pool workers use the
+        # calibrated values too.
+        return partial(cls.hash_password, **cls.parameters)
+
+    @classmethod
+    @stage_timers.timed("hash.hash")
+    async def hash_password_async(cls, password: str) -> str:
+        return await hash_pool.run(cls.hasher(), password)
+
+    @classmethod
+    @stage_timers.timed("hash.validate")
+    async def validate_password_async(cls, password: str, hashed_password) -> bool:
+        validator = cls.identify(hashed_password)
+        return await hash_pool.run(
+            validator.validate_password, password, hashed_password
+        )
+
+    @classmethod
+    async def dummy_validate_async(cls, password: str) -> bool:
+        # Spends the same work as a real verification when there is no user,
+        # so response times do not tell which emails have accounts.
+        if cls.dummy_hash is None or cls.needs_rehash(cls.dummy_hash):
+            cls.dummy_hash = await cls.hash_password_async(uuid4().hex)
+        await cls.validate_password_async(password, cls.dummy_hash)
+        return False
+
+    @classmethod
+    async def hash_passwords_async(cls, passwords: Iterable[str]) -> list[str]:
+        return await bulk_hash_pool.map(cls.hasher(), passwords)
+
+    @staticmethod
+    def measure(func: Callable[[], object]) -> float:
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
+
 
 class Bcrypt(HashPasswordABC):
+    PREFIXES = ("$2a$", "$2b$", "$2y$")
+    MIN_ROUNDS: Final = 4
+    MAX_ROUNDS: Final = 31
+    parameters = {"rounds": settings.hashing.bcrypt_rounds}
+
     @staticmethod
     def validate_password(password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(password.encode(), hashed_password.encode())
 
     @staticmethod
-    def hash_password(password: str) -> str:
-        return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    def hash_password(password: str, **parameters) -> str:
+        salt = bcrypt.gensalt(parameters.get("rounds", 12))
+        return bcrypt.hashpw(password.encode(), salt).decode()
+
+    @classmethod
+    def needs_rehash(cls, hashed_password: str) -> bool:
+        # Only weaker hashes are upgraded, so nodes that calibrated to
+        # different costs do not rehash the same users back and forth.
+        if not hashed_password.startswith(cls.PREFIXES):
+            return True
+        return int(hashed_password.split("$")[2]) < cls.parameters["rounds"]
+
+    @classmethod
+    def calibrate(cls, target_seconds: float) -> None:
+        # Each extra round doubles the cost, so stop at the last one whose
+        # successor would overshoot the target.
+        rounds = cls.MIN_ROUNDS
+        while rounds < cls.MAX_ROUNDS:
+            hashed = cls.hash_password("calibration", rounds=rounds)
+            elapsed = cls.measure(lambda: cls.validate_password("calibration", hashed))
+            if elapsed * 2 > target_seconds:
+                break
+            rounds += 1
+        cls.parameters = {"rounds": rounds}
+        cls.calibrated = True
+
+
+class Argon2id(HashPasswordABC):
+    PREFIXES = ("$argon2id$",)
+    MAX_TIME_COST: Final = 64
+    MISSING: Final = "argon2id hashing requires the argon2-cffi package"
+    parameters = {
+        "time_cost": settings.hashing.argon2_time_cost,
+        "memory_cost": settings.hashing.argon2_memory_cost,
+        "parallelism": settings.hashing.argon2_parallelism,
+    }
+
+    @classmethod
+    def password_hasher(cls, **parameters) -> "PasswordHasher":
+        if argon2 is None:
+            raise RuntimeError(cls.MISSING)
+        return argon2.PasswordHasher(type=argon2.Type.ID, **parameters)
+
+    @staticmethod
+    def validate_password(password: str, hashed_password: str) -> bool:
+        if argon2 is None:
+            raise RuntimeError(Argon2id.MISSING)
+        try:
+            return Argon2id.password_hasher().verify(hashed_password, password)
+        except (
+            argon2.exceptions.VerificationError,
+            argon2.exceptions.InvalidHashError,
+        ):
+            return False
+
+    @staticmethod
+    def hash_password(password: str, **parameters) -> str:
+        return Argon2id.password_hasher(**parameters).hash(password)
+
+    @classmethod
+    def needs_rehash(cls, hashed_password: str) -> bool:
+        if not hashed_password.startswith(cls.PREFIXES):
+            return True
+        if argon2 is None:
+            raise RuntimeError(cls.MISSING)
+        current = argon2.extract_parameters(hashed_password)
+        return (
+            current.time_cost < cls.parameters["time_cost"]
+            or current.memory_cost < cls.parameters["memory_cost"]
+        )
+
+    @classmethod
+    def calibrate(cls, target_seconds: float) -> None:
+        # Memory and parallelism stay as configured; each time cost step
+        # adds roughly the same amount of work.
+        parameters = dict(cls.parameters, time_cost=1)
+        while parameters["time_cost"] < cls.MAX_TIME_COST:
+            candidate = dict(parameters, time_cost=parameters["time_cost"] + 1)
+            hashed = cls.hash_password("calibration", **candidate)
+            elapsed = cls.measure(lambda: cls.validate_password("calibration", hashed))
+            if elapsed > target_seconds:
+                break
+            parameters = candidate
+        cls.parameters = parameters
+        cls.calibrated = True
+
+
+PASSWORD_HASHERS: dict[str, Type[HashPasswordABC]] = {
+    "bcrypt": Bcrypt,
+    "argon2id": Argon2id,
+}
+
+
+def password_hasher() -> Type[HashPasswordABC]:
+    return PASSWORD_HASHERS[settings.hashing.algorithm]
+
+
+def calibrate_password_hasher() -> None:
+    # The result is saved, so restarts, and nodes that share the file, keep
+    # one cost instead of each measuring a slightly different one.
+    config = settings.hashing
+    hasher = password_hasher()
+    if not config.target_verify_ms or hasher.calibrated:
+        return
+    key = {"algorithm": config.algorithm, "target_verify_ms": config.target_verify_ms}
+    path = config.calibration_file
+    if path is not None:
+        try:
+            saved = json.loads(path.read_text())
+        except (OSError, ValueError):
+            saved = {}
+        if isinstance(saved, dict) and {name: saved.get(name) for name in key} == key:
+            hasher.parameters = saved["parameters"]
+            hasher.calibrated = True
+            return
+
+    hasher.calibrate(config.target_verify_ms / 1000)
+    logger.info("Calibrated %s hashing: %s", config.algorithm, hasher.parameters)
+    if path is not None:
+        try:
+            temporary = path.with_suffix(f".{os.getpid()}.tmp")
+            temporary.write_text(json.dumps({**key, "parameters": hasher.parameters}))
+            temporary.replace(path)
+        except OSError:
+            logger.warning("Could not save the hashing calibration to %s", path)
+
+
+metrics.register(
+    "password_hashing",
+    lambda: {"algorithm": settings.hashing.algorithm, **password_hasher().parameters},
+)
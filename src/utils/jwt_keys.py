@@ -0,0 +1,82 @@
+import hashlib
+import json
+from base64 import urlsafe_b64encode
+from typing import Any, Final
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from jwt.algorithms import Algorithm, get_default_algorithms
+
+
+class JWTKeys:
+    EC_CURVES: Final = {
+        "ES256": "secp256r1",
+        "ES384": "secp384r1",
+        "ES512": "secp521r1",
+    }
+    # Members that make up the RFC 7638 JWK thumbprint for each key type.
+    THUMBPRINT_MEMBERS: Final = {
+        "RSA": ("e", "kty", "n"),
+        "EC": ("crv", "kty", "x", "y"),
+        "OKP": ("crv", "kty", "x"),
+    }
+
+    def __init__(
+        self, algorithm: str, private_pem: bytes | None, public_pem: bytes
+    ) -> None:
+        self.algorithm: str = algorithm
+        self.algorithm_obj: Algorithm = get_default_algorithms()[algorithm]
+        # PyJWT returns already loaded `cryptography` keys from prepare_key
+        # as is, so parsing happens here once instead of on every token.
+        # Retired keys only keep their public half to verify old tokens.
+        self.private_key: Any = (
+            self.algorithm_obj.prepare_key(private_pem) if private_pem else None
+        )
+        self.public_key: Any = self.algorithm_obj.prepare_key(public_pem)
+        if self.private_key is not None:
+            self._validate()
+        self.jwk: dict = self.algorithm_obj.to_jwk(self.public_key, as_dict=True)
+        self.kid: str = self.thumbprint(self.jwk)
+
+    @classmethod
+    def algorithm_for(cls, public_key: Any, preferred: str) -> str:
+        if isinstance(public_key, rsa.RSAPublicKey):
+            return preferred if preferred.startswith(("RS", "PS")) else "RS256"
+        if isinstance(public_key, ec.EllipticCurvePublicKey):
+            for algorithm, curve in cls.EC_CURVES.items():
+                if public_key.curve.name == curve:
+                    return algorithm
+            raise ValueError(f"Unsupported curve {public_key.curve.name}")
+        return "EdDSA"
+
+    def public_jwk(self) -> dict:
+        return {**self.jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+    @classmethod
+    def thumbprint(cls, jwk: dict) -> str:
+        members = {name: jwk[name] for name in cls.THUMBPRINT_MEMBERS[jwk["kty"]]}
+        canonical = json.dumps(members, separators=(",", ":"), sort_keys=True)
+        digest = hashlib.sha256(canonical.encode()).digest()
+        return urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def _validate(self) -> None:
+        key = self.private_key
+        if self.algorithm.startswith(("RS", "PS")):
+            valid = isinstance(key, rsa.RSAPrivateKey)
+        elif self.algorithm in self.EC_CURVES:
+            valid = (
+                isinstance(key, ec.EllipticCurvePrivateKey)
+                and key.curve.name == self.EC_CURVES[self.algorithm]
+            )
+        else:
+            valid = isinstance(key, (ed25519.Ed25519PrivateKey, ed448.Ed448PrivateKey))
+        if not valid:
+            raise ValueError(
+                f"Private key of type {type(key).__name__} "
+                f"cannot be used with {self.algorithm}"
+            )
+
+        spki = (Encoding.DER, PublicFormat.SubjectPublicKeyInfo)
+        derived_public_key = key.public_key().public_bytes(*spki)
+        if derived_public_key != self.public_key.public_bytes(*spki):
+            raise ValueError("Public key does not match the private key")
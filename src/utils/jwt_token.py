@@ -1,12 +1,16 @@
 import datetime
 from datetime import timedelta
 from typing import NamedTuple, Literal, Final
+from uuid import uuid4
 
-from jwt import encode, decode
+from jwt import encode, decode, get_unverified_header
+from jwt.exceptions import InvalidTokenError
 
 from config import settings
 from src.auth.schemas import Payload
 from src.users.models import User
+from .keyring import KeyRing
+from .metrics import stage_timers
 
 
 class ExpireIATDates(NamedTuple):
@@ -15,27 +19,38 @@ class ExpireIATDates(NamedTuple):
 
 
 class JWTToken:
-    __private_key: Final = settings.auth_jwt.private_key.read_text()
-    __public_key: Final = settings.auth_jwt.public_key.read_text()
+    keyring: Final = KeyRing.from_config(settings.auth_jwt)
     __access_token_expire_minutes: Final = settings.auth_jwt.access_token_expire_minutes
     __refresh_token_expire_days: Final = settings.auth_jwt.refresh_token_expire_days
-    algorithm: Final = settings.auth_jwt.algorithm
 
     @classmethod
+    @stage_timers.timed("jwt.sign")
     def create_jwt(cls, payload: Payload) -> str:
         payload_dict: dict = payload.model_dump()
-        return encode(payload_dict, cls.__private_key, algorithm=cls.algorithm)
+        keys = cls.keyring.active
+        return encode(
+            payload_dict,
+            keys.private_key,
+            algorithm=keys.algorithm,
+            headers={"kid": keys.kid},
+        )
 
     @classmethod
+    @stage_timers.timed("jwt.verify")
     def decode(cls, jwt: str) -> dict:
-        return decode(jwt, cls.__public_key, algorithms=[cls.algorithm])
+        keys = cls.keyring.get(get_unverified_header(jwt).get("kid"))
+        if keys is None:
+            # Forged kids and keys retired from the keyring make the token
+            # invalid, like a bad signature does.
+            raise InvalidTokenError("Unknown signing key")
+        return decode(jwt, keys.public_key, algorithms=[keys.algorithm])
 
     @classmethod
     def create_payload(
-            cls,
-            user: User,
-            token_type: Literal["access", "refresh"],
-            expire_timedelta: timedelta,
+        cls,
+        user: User,
+        token_type: Literal["access", "refresh"],
+        expire_timedelta: timedelta,
     ) -> Payload:
         iat = datetime.datetime.now(datetime.UTC)
         exp = iat + expire_timedelta
@@ -44,11 +59,16 @@ class JWTToken:
             exp=exp.timestamp(),
             iat=iat.timestamp(),
             token_type=token_type,
+            email=user.email,
+            roles=user.roles,
+            ver=user.version,
+            claims_iat=iat.timestamp(),
+            jti=uuid4().hex,
         )
 
     @classmethod
     def create_access_token(
-            cls, user: User | None = None, old_payload: Payload | None = None
+        cls, user: User | None = None, old_payload: Payload | None = None
     ) -> str:
         if user:
             payload = cls.create_payload(
@@ -59,6 +79,7 @@ class JWTToken:
             exp = iat + timedelta(minutes=cls.__access_token_expire_minutes)
             old_payload.exp = exp.timestamp()
             old_payload.iat = iat.timestamp()
+            old_payload.jti = uuid4().hex
             payload = old_payload
         else:
             raise ValueError("Either user or payload must be provided")
@@ -69,4 +90,25 @@ class JWTToken:
         payload = cls.create_payload(
             user, "refresh", timedelta(days=cls.__refresh_token_expire_days)
         )
+        payload.jti = uuid4().hex
+        payload.fam = uuid4().hex
+        return cls.create_jwt(payload)
+
+    @classmethod
+    def rotate_refresh_token(cls, old_payload: Payload, user: User) -> str:
+        # Rotated tokens keep the family and its expiry, so revoking a family
+        # until its first token expires covers every token derived from it.
+        # The claims are taken from the freshly loaded user.
+        iat = datetime.datetime.now(datetime.UTC).timestamp()
+        payload = old_payload.model_copy(
+            update={
+                "iat": iat,
+                "email": user.email,
+                "roles": user.roles,
+                "ver": user.version,
+                "claims_iat": iat,
+                "jti": uuid4().hex,
+                "fam": old_payload.fam or uuid4().hex,
+            }
+        )
         return cls.create_jwt(payload)
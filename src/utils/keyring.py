@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Final
+
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    PublicFormat,
+    load_pem_private_key,
+    load_pem_public_key,
+)
+
+from config import AuthJWT
+from .jwt_keys import JWTKeys
+
+logger = logging.getLogger(__name__)
+
+
+class KeyRing:
+    PRIVATE_SUFFIX: Final = "-private.pem"
+    PUBLIC_SUFFIX: Final = "-public.pem"
+    # The signing keys, set by load().
+    active: JWTKeys
+
+    def __init__(
+        self, keys_dir: Path, algorithm: str, active_key: str | None = None
+    ) -> None:
+        self.keys_dir: Path = keys_dir
+        self.algorithm: str = algorithm
+        self.active_key: str | None = active_key
+        self.keys: dict[str, JWTKeys] = {}
+        self.snapshot: tuple = ()
+        # Counts reloads that dropped a key, so caches of verified tokens
+        # know to forget what those keys signed.
+        self.retirements: int = 0
+
+    @classmethod
+    def from_config(cls, config: AuthJWT) -> "KeyRing":
+        keyring = cls(config.keys_dir, config.algorithm, config.active_key)
+        keyring.load()
+        return keyring
+
+    def get(self, kid: str | None) -> JWTKeys | None:
+        # Tokens issued before kid headers existed were signed by the active key.
+        if kid is None:
+            return self.active
+        return self.keys.get(kid)
+
+    def jwks(self) -> dict:
+        return {"keys": [keys.public_jwk() for keys in self.keys.values()]}
+
+    def scan(self) -> tuple:
+        return tuple(
+            sorted(
+                (path.name, path.stat().st_mtime_ns, path.stat().st_size)
+                for path in self.keys_dir.glob("*.pem")
+                if path.name.endswith((self.PRIVATE_SUFFIX, self.PUBLIC_SUFFIX))
+            )
+        )
+
+    def load(self) -> None:
+        snapshot = self.scan()
+        names = {
+            name.removesuffix(self.PRIVATE_SUFFIX).removesuffix(self.PUBLIC_SUFFIX)
+            for name, _, _ in snapshot
+        }
+        keys: dict[str, JWTKeys] = {}
+        signing_keys: dict[str, tuple[int, JWTKeys]] = {}
+        for name in names:
+            private_path = self.keys_dir / f"{name}{self.PRIVATE_SUFFIX}"
+            public_path = self.keys_dir / f"{name}{self.PUBLIC_SUFFIX}"
+            key = self._load_pair(private_path, public_path)
+            keys[key.kid] = key
+            if key.private_key is not None:
+                signing_keys[name] = (private_path.stat().st_mtime_ns, key)
+
+        if self.active_key is not None:
+            if self.active_key not in signing_keys:
+                raise ValueError(f"Active key {self.active_key!r} has no private key")
+            active = signing_keys[self.active_key][1]
+        elif signing_keys:
+            # Without an explicit choice the most recently added key signs.
+            active = max(signing_keys.values(), key=lambda item: item[0])[1]
+        else:
+            raise ValueError(f"No private keys found in {self.keys_dir}")
+
+        # Swap references only once everything parsed, so requests never see
+        # a half-loaded keyring.
+        if self.keys.keys() - keys.keys():
+            self.retirements += 1
+        self.keys, self.active, self.snapshot = keys, active, snapshot
+
+    def _load_pair(self, private_path: Path, public_path: Path) -> JWTKeys:
+        private_pem = private_path.read_bytes() if private_path.exists() else None
+        if public_path.exists():
+            public_pem = public_path.read_bytes()
+        elif private_pem is None:
+            raise ValueError(f"Neither {private_path} nor {public_path} exists")
+        else:
+            public_pem = (
+                load_pem_private_key(private_pem, password=None)
+                .public_key()
+                .public_bytes(Encoding.PEM, PublicFormat.SubjectPublicKeyInfo)
+            )
+        algorithm = JWTKeys.algorithm_for(
+            load_pem_public_key(public_pem), self.algorithm
+        )
+        return JWTKeys(algorithm, private_pem, public_pem)
+
+    async def watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.scan) != self.snapshot:
+                    await asyncio.to_thread(self.load)
+                    logger.info(
+                        "Reloaded %d JWT keys, active kid %s",
+                        len(self.keys),
+                        self.active.kid,
+                    )
+            except Exception:
+                logger.exception("Failed to reload JWT keys, keeping current ones")
@@ -0,0 +1,179 @@
+import inspect
+import math
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Final, cast
+
+
+class Histogram:
+    DEFAULT_BUCKETS: Final = (
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+    )
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        self.counts: list[int] = [0] * (len(self.buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class MetricsRegistry:
+    HISTOGRAM_KEYS: Final = {"count", "sum", "buckets"}
+
+    def __init__(self) -> None:
+        self.collectors: dict[str, Callable[[], dict]] = {}
+        self.labels: dict[str, str] = {}
+
+    def register(
+        self, name: str, collector: Callable[[], dict], label: str | None = None
+    ) -> None:
+        # With a label, the collector's top-level keys become label values of
+        # one metric family instead of separate metric names.
+        self.collectors[name] = collector
+        if label is not None:
+            self.labels[name] = label
+
+    def collect(self) -> dict:
+        return {name: collector() for name, collector in self.collectors.items()}
+
+    def prometheus(self) -> str:
+        lines: list[str] = []
+        typed: set[str] = set()
+        for name, collected in self.collect().items():
+            family = self.metric_name(name)
+            if name in self.labels:
+                for key, value in collected.items():
+                    labels = {self.labels[name]: key}
+                    self._render(lines, typed, family, value, labels)
+            else:
+                self._render(lines, typed, family, collected, {})
+        return "\n".join(lines) + "\n"
+
+    def _render(
+        self, lines: list[str], typed: set[str], name: str, value, labels: dict
+    ) -> None:
+        if isinstance(value, dict) and self.HISTOGRAM_KEYS <= value.keys():
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, count in value["buckets"].items():
+                le = "+Inf" if bound == "inf" else bound
+                lines.append(
+                    self._sample(f"{name}_bucket", {**labels, "le": le}, count)
+                )
+            lines.append(self._sample(f"{name}_sum", labels, value["sum"]))
+            lines.append(self._sample(f"{name}_count", labels, value["count"]))
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                child = f"{name}_{self.metric_name(key)}"
+                self._render(lines, typed, child, item, labels)
+        elif isinstance(value, (bool, int, float)):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(self._sample(name, labels, value))
+
+    @staticmethod
+    def _sample(name: str, labels: dict, value: float) -> str:
+        rendered = ",".join(
+            '{}="{}"'.format(key, str(label).replace("\\", "\\\\").replace('"', '\\"'))
+            for key, label in labels.items()
+        )
+        value = float(value)
+        if math.isnan(value):
+            number = "NaN"
+        elif math.isinf(value):
+            number = "+Inf" if value > 0 else "-Inf"
+        else:
+            number = repr(value)
+        return f"{name}{{{rendered}}} {number}" if rendered else f"{name} {number}"
+
+    @staticmethod
+    def metric_name(name: str) -> str:
+        return re.sub(r"[^a-zA-Z0-9_]", "_", str(name))
+
+
+metrics = MetricsRegistry()
+
+
+class StageTimers:
+    def __init__(self) -> None:
+        self.histograms: dict[str, Histogram] = {}
+        # Per-request totals, only collected while a request profiler is on.
+        self.current: ContextVar[dict[str, float] | None] = ContextVar(
+            "stage_timings", default=None
+        )
+
+    def observe(self, stage: str, seconds: float) -> None:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+        timings = self.current.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+    def timed[F: Callable](self, stage: str) -> Callable[[F], F]:
+        def decorator(func: F) -> F:
+            if inspect.iscoroutinefunction(func):
+
+                @wraps(func)
+                async def async_timed(*args, **kwargs):
+                    started = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.observe(stage, time.perf_counter() - started)
+
+                return cast(F, async_timed)
+
+            @wraps(func)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - started)
+
+            return cast(F, timed)
+
+        return decorator
+
+    def collect(self) -> dict:
+        return {
+            stage: histogram.snapshot()
+            for stage, histogram in sorted(self.histograms.items())
+        }
+
+
+stage_timers = StageTimers()
+metrics.register("stage_duration_seconds", stage_timers.collect, label="stage")
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Final
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from config import settings
+from .metrics import metrics, stage_timers
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    MAX_SAMPLES: Final = 100_000
+    MAX_DEPTH: Final = 128
+
+    def __init__(
+        self,
+        output_dir: Path,
+        slow_request_seconds: float = 0.5,
+        interval_seconds: float = 0.005,
+    ) -> None:
+        self.output_dir = output_dir
+        self.slow_request_seconds = slow_request_seconds
+        self.interval_seconds = interval_seconds
+        self.samples: deque[tuple[float, str]] = deque(maxlen=self.MAX_SAMPLES)
+        self.in_flight: int = 0
+        self.slow_requests: int = 0
+        self.dumps: int = 0
+        self._active = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def enter(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="request-profiler", daemon=True
+            )
+            self._thread.start()
+        self.in_flight += 1
+        self._active.set()
+
+    def exit(self) -> None:
+        self.in_flight -= 1
+        if not self.in_flight:
+            self._active.clear()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._active.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stopped.clear()
+        self._active.clear()
+
+    def _run(self) -> None:
+        # Samples are only taken while requests are in flight, so an idle
+        # server pays nothing for the profiler being enabled.
+        own = threading.get_ident()
+        while not self._stopped.is_set():
+            self._active.wait()
+            time.sleep(self.interval_seconds)
+            now = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    stack = self.fold(frame)
+                    self.samples.append((now, f"{names.get(ident, ident)};{stack}"))
+
+    def fold(self, frame) -> str:
+        names: list[str] = []
+        while frame is not None and len(names) < self.MAX_DEPTH:
+            code = frame.f_code
+            names.append(f"{code.co_qualname} ({Path(code.co_filename).name})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def window(self, started: float, finished: float) -> Counter[str]:
+        return Counter(
+            stack for taken, stack in list(self.samples) if started <= taken <= finished
+        )
+
+    def dump(self, name: str, started: float, finished: float) -> Path | None:
+        # The event loop and the hashing pool are shared, so the flame data
+        # covers every thread during the request, not this request alone.
+        stacks = self.window(started, finished)
+        if not stacks:
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        elapsed_ms = round((finished - started) * 1000)
+        path = self.output_dir / f"{stamp}-{name}-{elapsed_ms}ms.folded"
+        with open(path, "w") as file:
+            for stack, count in stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        self.dumps += 1
+        return path
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "samples": len(self.samples),
+            "slow_requests": self.slow_requests,
+            "dumps": self.dumps,
+        }
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, profiler: SamplingProfiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: dict[str, float] = {}
+        token = stage_timers.current.set(stages)
+        self.profiler.enter()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            finished = time.perf_counter()
+            self.profiler.exit()
+            stage_timers.current.reset(token)
+
+        if finished - started < self.profiler.slow_request_seconds:
+            return
+        self.profiler.slow_requests += 1
+        name = re.sub(r"[^a-zA-Z0-9]+", "_", f"{scope['method']}{scope['path']}")
+        path = await asyncio.to_thread(
+            self.profiler.dump, name.strip("_"), started, finished
+        )
+        logger.warning(
+            "Slow request %s %s took %.1f ms, stages: %s, flame data: %s",
+            scope["method"],
+            scope["path"],
+            (finished - started) * 1000,
+            {stage: round(seconds * 1000, 1) for stage, seconds in stages.items()},
+            path,
+        )
+
+
+request_profiler = SamplingProfiler(
+    settings.profiling.output_dir,
+    settings.profiling.slow_request_ms / 1000,
+    settings.profiling.interval_ms / 1000,
+)
+metrics.register("request_profiler", request_profiler.stats)
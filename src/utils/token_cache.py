@@ -0,0 +1,50 @@
+import hashlib
+import time
+
+from config import settings
+from src.auth.schemas import Payload
+from .cache import TTLCache
+from .jwt_token import JWTToken
+from .keyring import KeyRing
+from .metrics import metrics
+
+
+class VerifiedTokenCache:
+    def __init__(self, maxsize: int, keyring: KeyRing | None = None) -> None:
+        self.cache: TTLCache[bytes, Payload] = TTLCache(maxsize)
+        self.keyring = keyring
+        self.retirements: int = keyring.retirements if keyring is not None else 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Payload | None:
+        if not self.cache.maxsize:
+            return None
+        self._forget_retired_keys()
+        payload: Payload | None = self.cache.get(self.digest(token))
+        # Callers may update the payload (e.g. on refresh), so hand out copies.
+        return payload.model_copy() if payload is not None else None
+
+    def set(self, token: str, payload: Payload) -> None:
+        ttl = payload.exp - time.time()
+        self._forget_retired_keys()
+        if self.cache.maxsize and ttl > 0:
+            self.cache.set(self.digest(token), payload.model_copy(), ttl=ttl)
+
+    def _forget_retired_keys(self) -> None:
+        # Tokens signed by a key that left the keyring must not outlive it
+        # here. Keys are rarely retired, so everything is dropped.
+        if self.keyring is not None and self.keyring.retirements != self.retirements:
+            self.retirements = self.keyring.retirements
+            self.cache.clear()
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+verified_tokens = VerifiedTokenCache(
+    settings.auth_jwt.verified_token_cache_size, JWTToken.keyring
+)
+metrics.register("verified_token_cache", verified_tokens.stats)
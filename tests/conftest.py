@@ -0,0 +1,44 @@
+from typing import Iterator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.auth.routers import router as auth_router
+from src.database import UnitOfWork, get_unit_of_work
+from src.metrics.routers import router as metrics_router
+from src.repositories.base import SQLAlchemyRepository
+from src.repositories.dependencies import repository_class
+from src.users.routers import router as users_router
+from tests.support import SQLiteDatabase
+
+
+@pytest.fixture
+def database(tmp_path) -> SQLiteDatabase:
+    pytest.importorskip("aiosqlite")
+    return SQLiteDatabase(tmp_path)
+
+
+@pytest.fixture
+def api(database) -> Iterator[TestClient]:
+    # The routers on the SQLite database, without the application lifespan.
+    # Database calls from the test go through client.portal so that they run
+    # on the client's event loop.
+    app = FastAPI()
+    for router in (users_router, auth_router, metrics_router):
+        app.include_router(router)
+
+    async def unit_of_work():
+        async with UnitOfWork(database.session_maker) as uow:
+            yield uow
+
+    app.dependency_overrides[get_unit_of_work] = unit_of_work
+    app.dependency_overrides[repository_class] = lambda: SQLAlchemyRepository
+    with TestClient(app) as client:
+        portal = client.portal
+        assert portal is not None
+        portal.call(database.__aenter__)
+        try:
+            yield client
+        finally:
+            portal.call(database.__aexit__, None, None, None)
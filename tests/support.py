@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database import Base, EngineRouter, RoutingSession, create_engine
+
+
+class SQLiteDatabase:
+    def __init__(self, directory: Path, replicas: int = 0) -> None:
+        self.primary = create_engine(f"sqlite+aiosqlite:///{directory / 'primary.db'}")
+        self.replicas = [
+            create_engine(f"sqlite+aiosqlite:///{directory / f'replica{index}.db'}")
+            for index in range(replicas)
+        ]
+        session_class = type(
+            "TestRoutingSession",
+            (RoutingSession,),
+            {"router": EngineRouter(self.primary, self.replicas)},
+        )
+        self.session_maker = async_sessionmaker(
+            class_=AsyncSession,
+            sync_session_class=session_class,
+            expire_on_commit=False,
+        )
+
+    async def __aenter__(self) -> "SQLiteDatabase":
+        for engine in (self.primary, *self.replicas):
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        # aiosqlite keeps a thread per connection that would block the exit.
+        for engine in (self.primary, *self.replicas):
+            await engine.dispose()
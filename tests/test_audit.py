@@ -0,0 +1,135 @@
+import asyncio
+from typing import Literal
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from src.auth.audit import AuthAuditLog
+from src.repositories.base import SQLAlchemyRepository
+
+
+class FakeRepository(SQLAlchemyRepository):
+    rows: list[dict] = []
+    failing: bool = False
+
+    async def insert_many(self, values: list[dict]) -> None:
+        if FakeRepository.failing:
+            raise ConnectionError("database is down")
+        if any(row["detail"] == "invalid" for row in values):
+            raise DBAPIError("INSERT", values, ValueError("value too long"))
+        FakeRepository.rows.extend(values)
+
+
+def test_overflow_policies_drop_oldest_or_newest():
+    async def main():
+        policies: list[tuple[Literal["drop_oldest", "drop_newest"], list[int]]] = [
+            ("drop_oldest", [2, 3]),
+            ("drop_newest", [1, 2]),
+        ]
+        for overflow, kept in policies:
+            audit = AuthAuditLog(FakeRepository, max_queue_size=2, overflow=overflow)
+            for idx in (1, 2, 3):
+                await audit.record("login_failure", idx)
+            assert [row["user_id"] for row in audit.queue] == kept
+            assert audit.stats()["dropped"] == 1
+
+    asyncio.run(main())
+
+
+def test_writer_flushes_batches_and_drains_on_close():
+    FakeRepository.rows, FakeRepository.failing = [], False
+
+    async def main():
+        audit = AuthAuditLog(FakeRepository, batch_size=2, flush_interval_seconds=60)
+        await audit.start()
+        for idx in range(3):
+            await audit.record("login_success", idx)
+        await asyncio.sleep(0.01)
+        # The full batch is written right away, the rest waits for the timer.
+        assert len(FakeRepository.rows) == 2
+        await audit.close()
+        assert [row["user_id"] for row in FakeRepository.rows] == [0, 1, 2]
+
+    asyncio.run(main())
+
+
+def test_failed_batches_are_requeued():
+    FakeRepository.rows, FakeRepository.failing = [], True
+
+    async def main():
+        audit = AuthAuditLog(FakeRepository)
+        await audit.record("logout", 1)
+        assert not await audit.flush()
+        assert len(audit.queue) == 1 and audit.write_errors == 1
+        FakeRepository.failing = False
+        assert await audit.flush()
+        assert audit.stats()["written"] == 1
+
+    asyncio.run(main())
+
+
+def test_long_values_are_cut_to_the_column_sizes():
+    async def main():
+        audit = AuthAuditLog(FakeRepository)
+        await audit.record("login_failure", email="a" * 100, ip="1" * 100)
+        return audit.queue[0]
+
+    row = asyncio.run(main())
+    assert (len(row["email"]), len(row["ip"])) == (40, 45)
+
+
+def test_rejected_rows_are_dropped_from_a_failed_batch():
+    FakeRepository.rows, FakeRepository.failing = [], False
+
+    async def main():
+        audit = AuthAuditLog(FakeRepository)
+        for detail in ("first", "invalid", "last"):
+            await audit.record("logout", 1, detail=detail)
+        assert await audit.flush()
+        return audit.stats()
+
+    stats = asyncio.run(main())
+    assert [row["detail"] for row in FakeRepository.rows] == ["first", "last"]
+    assert (stats["written"], stats["rejected"], stats["queue_depth"]) == (2, 1, 0)
+
+
+def test_close_waits_for_the_batch_being_written():
+    FakeRepository.rows, FakeRepository.failing = [], False
+
+    class SlowRepository(FakeRepository):
+        async def insert_many(self, values: list[dict]) -> None:
+            await asyncio.sleep(0.2)
+            await super().insert_many(values)
+
+    async def main():
+        audit = AuthAuditLog(SlowRepository, batch_size=2, flush_interval_seconds=60)
+        await audit.start()
+        for idx in range(3):
+            await audit.record("login_success", idx)
+        await asyncio.sleep(0.05)
+        await audit.close()
+        return audit.stats()
+
+    stats = asyncio.run(main())
+    assert [row["user_id"] for row in FakeRepository.rows] == [0, 1, 2]
+    assert (stats["written"], stats["dropped"], stats["queue_depth"]) == (3, 0, 0)
+
+
+def test_a_cancelled_flush_puts_its_batch_back():
+    FakeRepository.rows, FakeRepository.failing = [], False
+
+    class HangingRepository(FakeRepository):
+        async def insert_many(self, values: list[dict]) -> None:
+            await asyncio.Event().wait()
+
+    async def main():
+        audit = AuthAuditLog(HangingRepository)
+        await audit.record("logout", 1)
+        flush = asyncio.create_task(audit.flush())
+        await asyncio.sleep(0.01)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+        return audit
+
+    assert [row["user_id"] for row in asyncio.run(main()).queue] == [1]
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from datetime import timedelta
+from http.cookies import SimpleCookie
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from config import settings
+from src.auth.audit import AuthAuditLog
+from src.auth.revocation import MemoryRevocationStore
+from src.auth.schemas import Payload
+from src.database import UnitOfWork
+from src.repositories.base import SQLAlchemyRepository
+from src.services.auth import JWTAuthService
+from src.users.models import User
+from src.users.schemas import UserCreate, UserRead
+from src.utils.hash_password import Bcrypt
+from src.utils.jwt_token import JWTToken
+
+
+def make_request(**cookies: str) -> Request:
+    cookie = "; ".join(f"{name}={value}" for name, value in cookies.items())
+    return Request(
+        {
+            "type": "http",
+            "headers": [(b"cookie", cookie.encode())],
+            "client": ("127.0.0.1", 1234),
+        }
+    )
+
+
+def response_cookies(response: Response) -> dict[str, str]:
+    jar = SimpleCookie()
+    for header in response.headers.getlist("set-cookie"):
+        jar.load(header)
+    return {name: morsel.value for name, morsel in jar.items()}
+
+
+def make_service(uow: UnitOfWork) -> JWTAuthService:
+    return JWTAuthService(
+        SQLAlchemyRepository,
+        Bcrypt,
+        uow,
+        revocations=MemoryRevocationStore(),
+        audit=AuthAuditLog(enabled=False),
+    )
+
+
+async def create_user(database) -> User:
+    async with UnitOfWork(database.session_maker) as uow:
+        return await SQLAlchemyRepository(User, uow).create_one(
+            UserCreate(email="user@example.com", password="hash")
+        )
+
+
+def test_stateless_me_trusts_fresh_claims_only(database, monkeypatch):
+    monkeypatch.setattr(settings.auth_jwt, "stateless_me", True)
+
+    async def me(token: str) -> User | UserRead | None:
+        async with UnitOfWork(database.session_maker) as uow:
+            return await make_service(uow).authorized(make_request(access_token=token))
+
+    async def main():
+        async with database:
+            user = await create_user(database)
+            token = JWTToken.create_access_token(user)
+            fresh = await me(token)
+            monkeypatch.setattr(settings.auth_jwt, "claims_max_age_seconds", -1)
+            stale = await me(token)
+        return user, fresh, stale
+
+    user, fresh, stale = asyncio.run(main())
+    assert type(fresh) is UserRead
+    assert (fresh.id, fresh.email, fresh.version) == (user.id, user.email, 1)
+    assert type(stale) is User and stale.id == user.id
+
+
+def test_version_bump_outdates_issued_tokens(database):
+    async def main():
+        async with database:
+            user = await create_user(database)
+            access_token = JWTToken.create_access_token(user)
+            refresh_token = JWTToken.create_refresh_token(user)
+            async with UnitOfWork(database.session_maker) as uow:
+                service = make_service(uow)
+                await service.update_user(user.id, {"roles": ["admin"]})
+            async with UnitOfWork(database.session_maker) as uow:
+                service = make_service(uow)
+                with pytest.raises(HTTPException) as me_error:
+                    await service.authorized(make_request(access_token=access_token))
+                with pytest.raises(HTTPException) as refresh_error:
+                    await service.refresh_token(
+                        make_request(refresh_token=refresh_token), Response()
+                    )
+                current = await service.repository.get_one_by_id(user.id)
+        return me_error.value, refresh_error.value, current
+
+    me_error, refresh_error, current = asyncio.run(main())
+    assert me_error.status_code == refresh_error.status_code == 403
+    assert me_error.detail == refresh_error.detail == "Token outdated"
+    assert current is not None
+    assert (current.version, current.roles) == (2, ["admin"])
+
+
+def test_refresh_reloads_claims(database):
+    async def main():
+        async with database:
+            user = await create_user(database)
+            payload = JWTToken.create_payload(user, "refresh", timedelta(days=1))
+            payload.claims_iat = payload.iat - 3600
+            payload.fam = payload.jti
+            response = Response()
+            async with UnitOfWork(database.session_maker) as uow:
+                await make_service(uow).refresh_token(
+                    make_request(refresh_token=JWTToken.create_jwt(payload)), response
+                )
+        return payload, response_cookies(response)
+
+    payload, cookies = asyncio.run(main())
+    access = Payload(**JWTToken.decode(cookies["access_token"]))
+    refresh = Payload(**JWTToken.decode(cookies["refresh_token"]))
+    assert access.claims_iat is not None and access.claims_iat > time.time() - 60
+    assert refresh.claims_iat == refresh.iat
+    assert refresh.fam == payload.fam and refresh.exp == payload.exp
+
+
+def test_legacy_refresh_token_is_consumed_once(database):
+    async def refresh(service: JWTAuthService, token: str) -> dict[str, str]:
+        response = Response()
+        await service.refresh_token(make_request(refresh_token=token), response)
+        return response_cookies(response)
+
+    async def main():
+        async with database:
+            user = await create_user(database)
+            payload = JWTToken.create_payload(user, "refresh", timedelta(days=1))
+            payload.jti = None
+            legacy_token = JWTToken.create_jwt(payload)
+            async with UnitOfWork(database.session_maker) as uow:
+                service = make_service(uow)
+                rotated = await refresh(service, legacy_token)
+                with pytest.raises(HTTPException) as replay_error:
+                    await refresh(service, legacy_token)
+                # The replay also revokes the tokens the legacy one was swapped for.
+                with pytest.raises(HTTPException) as rotated_error:
+                    await refresh(service, rotated["refresh_token"])
+        return replay_error.value, rotated_error.value
+
+    replay_error, rotated_error = asyncio.run(main())
+    assert replay_error.status_code == rotated_error.status_code == 403
+    assert replay_error.detail == rotated_error.detail == "Refresh token revoked"
+
+
+def test_admin_updates_users(api, database):
+    async def create(email: str, roles: list[str]) -> User:
+        async with UnitOfWork(database.session_maker) as uow:
+            repository = SQLAlchemyRepository(User, uow)
+            user = await repository.create_one(UserCreate(email=email, password="hash"))
+            await repository.update_by({"id": user.id}, {"roles": roles})
+        return user
+
+    async def get(idx: int) -> User | None:
+        async with UnitOfWork(database.session_maker) as uow:
+            return await SQLAlchemyRepository(User, uow).get_one_by_id(idx)
+
+    user = api.portal.call(create, "user@example.com", [])
+    admin = api.portal.call(create, "admin@example.com", ["admin"])
+    url = f"/auth/users/{user.id}"
+    api.cookies.set("access_token", JWTToken.create_access_token(user))
+    assert api.patch(url, json={"roles": ["admin"]}).status_code == 403
+
+    api.cookies.set("access_token", JWTToken.create_access_token(admin))
+    assert api.patch(url, json={"roles": ["editor"]}).status_code == 200
+    assert api.patch(url, json={"email": admin.email}).status_code == 409
+    assert api.patch(url, json={}).status_code == 422
+    assert api.patch("/auth/users/0", json={"roles": []}).status_code == 404
+    updated = api.portal.call(get, user.id)
+    assert (updated.roles, updated.version) == (["editor"], 2)
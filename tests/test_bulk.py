@@ -0,0 +1,149 @@
+import asyncio
+
+from src.auth.audit import AuthAuditLog
+from src.auth.bulk import read_records
+from src.database import UnitOfWork
+from src.repositories.base import SQLAlchemyRepository
+from src.services.auth import JWTAuthService
+from src.users.models import User
+from src.users.schemas import UserCreate
+from src.utils.hash_password import (
+    Bcrypt,
+    HashPoolOverloadedError,
+    password_hasher,
+)
+from src.utils.jwt_token import JWTToken
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def collect(records):
+    async def main():
+        return [record async for record in records]
+
+    return asyncio.run(main())
+
+
+def test_read_records_parses_ndjson_across_chunks():
+    records = collect(
+        read_records(
+            chunks(
+                b'{"email": "a@example.com"}\n{"em', b'ail": "b@example.com"}\nnope'
+            ),
+            "application/x-ndjson",
+        )
+    )
+    assert records == [
+        (1, {"email": "a@example.com"}),
+        (2, {"email": "b@example.com"}),
+        (3, None),
+    ]
+
+
+def test_read_records_parses_csv_with_header():
+    records = collect(
+        read_records(
+            chunks(b"email,password\r\na@example.com,secret\r\n\r\nbroken\r\n"),
+            "text/csv",
+        )
+    )
+    assert records == [
+        (2, {"email": "a@example.com", "password": "secret"}),
+        (4, None),
+    ]
+
+
+def test_read_records_reports_undecodable_lines():
+    records = collect(
+        read_records(
+            chunks(b'{"email": "a@example.com"}\n\xff\xfe\n{"email": "b@example.com"}'),
+            "application/x-ndjson",
+        )
+    )
+    assert records == [
+        (1, {"email": "a@example.com"}),
+        (2, None),
+        (3, {"email": "b@example.com"}),
+    ]
+
+
+def test_bulk_registration_requires_admin(api, database, monkeypatch):
+    async def hash_passwords(passwords):
+        return [f"hash-{password}" for password in passwords]
+
+    monkeypatch.setattr(password_hasher(), "hash_passwords_async", hash_passwords)
+
+    async def create(email: str, roles: list[str]) -> str:
+        async with UnitOfWork(database.session_maker) as uow:
+            user = await SQLAlchemyRepository(User, uow).create_one(
+                UserCreate(email=email, password="hash")
+            )
+            await SQLAlchemyRepository(User, uow).update_by(
+                {"id": user.id}, {"roles": roles}
+            )
+            user.roles = roles
+        return JWTToken.create_access_token(user)
+
+    body = b'{"email": "new@example.com", "password": "secret"}\n\xff\xfe\n'
+    assert api.post("/auth/register/bulk", content=body).status_code == 403
+    api.cookies.set("access_token", api.portal.call(create, "user@example.com", []))
+    assert api.post("/auth/register/bulk", content=body).status_code == 403
+
+    api.cookies.set(
+        "access_token", api.portal.call(create, "admin@example.com", ["admin"])
+    )
+    response = api.post("/auth/register/bulk", content=body)
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+    assert response.json()["results"][1] == {
+        "line": 2,
+        "status": "invalid",
+        "detail": "Malformed row",
+    }
+
+
+def test_failed_batch_keeps_the_committed_ones(database, monkeypatch):
+    calls = []
+
+    class FlakyHasher(Bcrypt):
+        @classmethod
+        async def hash_passwords_async(cls, passwords):
+            calls.append(list(passwords))
+            if len(calls) == 2:
+                raise HashPoolOverloadedError
+            return [f"hash-{password}" for password in calls[-1]]
+
+    monkeypatch.setattr(JWTAuthService, "BULK_BATCH_SIZE", 1)
+
+    async def records():
+        for idx in range(3):
+            yield idx + 1, {"email": f"user{idx}@example.com", "password": "secret"}
+
+    async def main():
+        async with database:
+            async with UnitOfWork(database.session_maker) as uow:
+                service = JWTAuthService(
+                    SQLAlchemyRepository,
+                    FlakyHasher,
+                    uow,
+                    audit=AuthAuditLog(enabled=False),
+                )
+                report = await service.register_many(records())
+                # The request's own unit of work is rolled back, as on an
+                # error response; the batches were committed on their own.
+                await uow.session.rollback()
+            async with UnitOfWork(database.session_maker) as uow:
+                users = await SQLAlchemyRepository(User, uow).get_all()
+        return report, [user.email for user in users]
+
+    report, emails = asyncio.run(main())
+    assert [result["status"] for result in report["results"]] == [
+        "created",
+        "failed",
+        "created",
+    ]
+    assert report["failed"] == 1
+    assert emails == ["user0@example.com", "user2@example.com"]
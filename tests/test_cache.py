@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from src.repositories.base import SQLAlchemyRepository
+from src.repositories.cached import CachedRepository
+from src.users.models import User
+from src.utils.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+class FakeRepository(SQLAlchemyRepository):
+    queries = 0
+
+    async def get_one_by_id(self, idx):
+        FakeRepository.queries += 1
+        return User(id=idx, email=f"{idx}@example.com", password="")
+
+    async def filter_by(self, filter_by):
+        FakeRepository.queries += 1
+        return User(id=1, email=filter_by["email"], password="")
+
+    async def create_one(self, create_schema):
+        return User(id=1, email="1@example.com", password="")
+
+
+class FakeCachedRepository(CachedRepository):
+    repository_class = FakeRepository
+    caches = {}
+
+
+def test_cached_repository_serves_id_and_unique_lookups():
+    repository = FakeCachedRepository(User)
+
+    async def main():
+        await repository.get_one_by_id(1)
+        await repository.get_one_by_id(1)
+        await repository.filter_by({"email": "1@example.com"})
+        assert FakeRepository.queries == 1
+        await repository.create_one(None)
+        await repository.filter_by({"email": "1@example.com"})
+        assert FakeRepository.queries == 2
+
+    asyncio.run(main())
+    assert FakeCachedRepository.stats()["User"]["misses"] == 2
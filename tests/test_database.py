@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from src.database import UnitOfWork
+from src.repositories.base import SQLAlchemyRepository
+from src.users.models import User
+from src.users.schemas import UserCreate
+from tests.support import SQLiteDatabase
+
+pytest.importorskip("aiosqlite")
+
+
+def test_reads_go_to_replica_and_writes_to_primary(tmp_path):
+    schema = UserCreate(email="user@example.com", password="secret")
+
+    async def main():
+        async with SQLiteDatabase(tmp_path, replicas=1) as database:
+            async with UnitOfWork(database.session_maker) as uow:
+                repository = SQLAlchemyRepository(User, uow)
+                assert await repository.filter_by({"email": schema.email}) is None
+                created = await repository.create_if_absent(schema)
+                assert created is not None
+                # Read-your-writes: the session sticks to the primary after a write.
+                assert await repository.get_one_by_id(created.id) is not None
+
+            async with UnitOfWork(database.session_maker) as uow:
+                repository = SQLAlchemyRepository(User, uow)
+                assert await repository.get_one_by_id(created.id) is None
+
+    asyncio.run(main())
+
+
+def test_create_many_skips_existing_rows(database):
+    schemas = [
+        UserCreate(email=f"user{idx}@example.com", password="secret")
+        for idx in range(3)
+    ]
+
+    async def main():
+        async with database, UnitOfWork(database.session_maker) as uow:
+            repository = SQLAlchemyRepository(User, uow)
+            assert len(await repository.create_many(schemas[:1])) == 1
+            return await repository.create_many(schemas)
+
+    created = asyncio.run(main())
+    assert sorted(user.email for user in created) == [
+        schema.email for schema in schemas[1:]
+    ]
+
+
+def test_row_reads_return_only_the_projected_columns(database):
+    schemas = [
+        UserCreate(email=f"user{idx}@example.com", password="secret")
+        for idx in range(3)
+    ]
+
+    async def main():
+        async with database, UnitOfWork(database.session_maker) as uow:
+            repository = SQLAlchemyRepository(User, uow)
+            created = await repository.create_many(schemas)
+            page = await repository.get_page_rows(("id", "email"), None, 2)
+            after = await repository.get_page_rows(("id",), page[-1]["id"], 2)
+            row = await repository.get_row_by_id(("email",), created[0].id)
+        assert page == [{"id": user.id, "email": user.email} for user in created[:2]]
+        assert after == [{"id": created[2].id}]
+        assert row == {"email": created[0].email}
+
+    asyncio.run(main())
+
+
+def test_get_one_by_id_answers_from_the_identity_map(database):
+    statements = []
+
+    def count(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    async def main():
+        async with database, UnitOfWork(database.session_maker) as uow:
+            repository = SQLAlchemyRepository(User, uow)
+            created = await repository.create_one(
+                UserCreate(email="user@example.com", password="secret")
+            )
+            event.listen(database.primary.sync_engine, "before_cursor_execute", count)
+            try:
+                assert await repository.get_one_by_id(created.id) is created
+            finally:
+                event.remove(
+                    database.primary.sync_engine, "before_cursor_execute", count
+                )
+
+    asyncio.run(main())
+    assert statements == []
+
+
+def test_cached_statements_run_with_each_calls_parameters(database):
+    schemas = [
+        UserCreate(email=f"user{idx}@example.com", password="secret")
+        for idx in range(2)
+    ]
+
+    async def main():
+        async with database:
+            async with UnitOfWork(database.session_maker) as uow:
+                repository = SQLAlchemyRepository(User, uow)
+                created = [await repository.create_one(schema) for schema in schemas]
+                for user in created:
+                    found = await repository.filter_by({"email": user.email})
+                    assert found is not None and found.id == user.id
+                assert await repository.update_by(
+                    {"id": created[0].id}, {"password": "new"}
+                )
+                assert await repository.filter_by({"email": None}) is None
+            async with UnitOfWork(database.session_maker) as uow:
+                repository = SQLAlchemyRepository(User, uow)
+                found = [
+                    await repository.filter_by({"email": schema.email})
+                    for schema in schemas
+                ]
+                return [user.password if user else None for user in found]
+
+    assert asyncio.run(main()) == ["new", "secret"]
+
+
+def test_update_by_refreshes_objects_in_the_session(database):
+    async def main():
+        async with database, UnitOfWork(database.session_maker) as uow:
+            repository = SQLAlchemyRepository(User, uow)
+            user = await repository.create_one(
+                UserCreate(email="user@example.com", password="old")
+            )
+            assert await repository.update_by({"id": user.id}, {"password": "new"})
+            assert user.password == "new"
+            found = await repository.get_one_by_id(user.id)
+            assert found is not None and found.password == "new"
+
+    asyncio.run(main())
+
+
+def test_create_if_absent_lets_one_of_concurrent_inserts_win(database):
+    schema = UserCreate(email="user@example.com", password="secret")
+
+    async def attempt() -> User | None:
+        async with UnitOfWork(database.session_maker) as uow:
+            return await SQLAlchemyRepository(User, uow).create_if_absent(schema)
+
+    async def main():
+        async with database:
+            return await asyncio.gather(*(attempt() for _ in range(5)))
+
+    results = asyncio.run(main())
+    # The losers hit the unique constraint; ON CONFLICT DO NOTHING makes that
+    # an empty RETURNING instead of an IntegrityError.
+    assert [result is not None for result in results].count(True) == 1
+
+
+@pytest.mark.parametrize(
+    "error", [None, HTTPException(status_code=409), RuntimeError("boom")]
+)
+def test_unit_of_work_commits_only_on_success(database, error):
+    schema = UserCreate(email="user@example.com", password="secret")
+
+    async def write() -> None:
+        async with UnitOfWork(database.session_maker) as uow:
+            await SQLAlchemyRepository(User, uow).create_one(schema)
+            if error is not None:
+                raise error
+
+    async def main():
+        async with database:
+            if error is None:
+                await write()
+            else:
+                with pytest.raises(type(error)):
+                    await write()
+            async with UnitOfWork(database.session_maker) as uow:
+                return await SQLAlchemyRepository(User, uow).filter_by(
+                    {"email": schema.email}
+                )
+
+    assert (asyncio.run(main()) is not None) == (error is None)
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from src.auth.denylist import AccessTokenDenylist, MemoryDenylistStore
+from src.utils.bloom import BloomFilter
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+    for idx in range(1000):
+        bloom.add(f"revoked-{idx}")
+    assert all(f"revoked-{idx}" in bloom for idx in range(1000))
+    false_positives = sum(f"valid-{idx}" in bloom for idx in range(10_000))
+    assert false_positives < 300
+    assert bloom.stats()["memory_bytes"] < 1300
+
+
+def test_denylist_only_asks_store_for_filter_positives():
+    denylist = AccessTokenDenylist(MemoryDenylistStore(), capacity=2)
+
+    async def main():
+        await denylist.revoke("revoked", time.time() + 60)
+        assert await denylist.is_revoked("revoked")
+        assert not await denylist.is_revoked("valid")
+        for idx in range(3):
+            await denylist.revoke(f"other-{idx}", time.time() + 60)
+        await denylist.sync()
+
+    asyncio.run(main())
+    assert denylist.filter_positives == 1
+    assert denylist.rebuilds == 1
+    assert len(denylist.filter) == 4
+
+
+def test_denylist_over_capacity_does_not_rebuild_on_every_sync():
+    denylist = AccessTokenDenylist(MemoryDenylistStore(), capacity=2)
+
+    async def main():
+        for idx in range(3):
+            await denylist.revoke(f"revoked-{idx}", time.time() + 60)
+        await denylist.sync()
+        await denylist.revoke("revoked-3", time.time() + 60)
+        await denylist.sync()
+        await denylist.sync()
+
+    asyncio.run(main())
+    assert denylist.rebuilds == 1
+    assert denylist.filter.capacity == 6
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from config import settings
+from src.utils import hash_password
+from src.utils.hash_password import (
+    Argon2id,
+    Bcrypt,
+    HashPool,
+    HashPoolOverloadedError,
+    calibrate_password_hasher,
+)
+
+
+def test_hash_password_async():
+    async def main():
+        hashed = await Bcrypt.hash_password_async("secret")
+        assert await Bcrypt.validate_password_async("secret", hashed)
+        assert not await Bcrypt.validate_password_async("wrong", hashed)
+
+    asyncio.run(main())
+
+
+def test_hash_pool_sheds_load_when_queue_is_full():
+    pool = HashPool(max_workers=1, max_queue_size=0)
+
+    async def main():
+        busy = asyncio.create_task(pool.run(time.sleep, 0.1))
+        await asyncio.sleep(0)
+        with pytest.raises(HashPoolOverloadedError):
+            await pool.run(time.sleep, 0)
+        await busy
+
+    asyncio.run(main())
+    assert pool.rejected == 1
+    pool.shutdown()
+
+
+def test_bcrypt_calibration_and_rehash(monkeypatch):
+    monkeypatch.setattr(Bcrypt, "parameters", {"rounds": 5})
+    assert Bcrypt.needs_rehash(Bcrypt.hash_password("secret", rounds=4))
+    assert not Bcrypt.needs_rehash(Bcrypt.hasher()("secret"))
+    # A node calibrated lower leaves stronger hashes alone.
+    assert not Bcrypt.needs_rehash(Bcrypt.hash_password("secret", rounds=6))
+
+    Bcrypt.calibrate(target_seconds=0.001)
+    assert Bcrypt.parameters == {"rounds": Bcrypt.MIN_ROUNDS}
+
+
+def test_argon2id_hashes_are_verified_and_upgraded(monkeypatch):
+    pytest.importorskip("argon2")
+    parameters = {"time_cost": 1, "memory_cost": 1024, "parallelism": 1}
+    monkeypatch.setattr(Argon2id, "parameters", parameters)
+
+    async def main():
+        hashed = await Argon2id.hash_password_async("secret")
+        assert await Bcrypt.validate_password_async("secret", hashed)
+        assert not await Bcrypt.validate_password_async("wrong", hashed)
+        return hashed
+
+    hashed = asyncio.run(main())
+    assert Bcrypt.needs_rehash(hashed)
+    assert not Argon2id.needs_rehash(hashed)
+    assert Argon2id.needs_rehash(Bcrypt.hash_password("secret", rounds=4))
+
+
+def test_calibration_is_saved_and_reused(tmp_path, monkeypatch):
+    path = tmp_path / "calibration.json"
+    monkeypatch.setattr(settings.hashing, "algorithm", "bcrypt")
+    monkeypatch.setattr(settings.hashing, "target_verify_ms", 1)
+    monkeypatch.setattr(settings.hashing, "calibration_file", path)
+    monkeypatch.setattr(Bcrypt, "parameters", {"rounds": 12})
+    monkeypatch.setattr(Bcrypt, "calibrated", False)
+
+    calibrate_password_hasher()
+    assert Bcrypt.parameters == {"rounds": Bcrypt.MIN_ROUNDS}
+    saved = json.loads(path.read_text())
+    assert saved["parameters"] == Bcrypt.parameters
+
+    # Another process with the same target takes the saved cost as it is.
+    path.write_text(json.dumps({**saved, "parameters": {"rounds": 9}}))
+    monkeypatch.setattr(Bcrypt, "calibrated", False)
+    calibrate_password_hasher()
+    assert Bcrypt.parameters == {"rounds": 9}
+
+
+def test_argon2id_without_the_package_fails_clearly(monkeypatch):
+    monkeypatch.setattr(hash_password, "argon2", None)
+    with pytest.raises(RuntimeError):
+        Argon2id.validate_password("secret", "$argon2id$v=19$m=1024,t=1,p=1$x$y")
+    with pytest.raises(RuntimeError):
+        Argon2id.needs_rehash("$argon2id$v=19$m=1024,t=1,p=1$x$y")
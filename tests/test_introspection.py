@@ -0,0 +1,85 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import Literal
+
+import pytest
+
+from config import settings
+from src.auth.introspection import TokenIntrospector
+from src.auth.schemas import Payload
+from src.database import UnitOfWork
+from src.repositories.base import SQLAlchemyRepository
+from src.users.models import User
+from src.users.schemas import UserCreate
+from src.utils.hash_password import HashPool
+from src.utils.jwt_token import JWTToken
+
+
+def make_token() -> str:
+    now = time.time()
+    return JWTToken.create_jwt(
+        Payload(sub=1, exp=now + 60, iat=now, token_type="access")
+    )
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_introspector_decodes_inline_and_in_the_pool_alike(
+    executor: Literal["thread", "process"]
+):
+    pool = HashPool(executor, max_workers=2)
+    introspector = TokenIntrospector(pool, parallel_threshold=4)
+    tokens = [make_token(), "not-a-token"] * 3
+
+    try:
+        inline = asyncio.run(introspector.decode(tokens[:2]))
+        parallel = asyncio.run(introspector.decode(tokens))
+    finally:
+        pool.shutdown()
+    assert inline[0] is not None and inline[0]["sub"] == 1
+    assert inline[1] is None
+    assert parallel == inline * 3
+    assert introspector.stats()["parallel_batches"] == 1
+
+
+def test_cache_ttl_is_capped_and_never_negative():
+    introspector = TokenIntrospector(HashPool(), max_cache_ttl_seconds=30)
+    assert introspector.cache_ttl(1010, now=1000) == 10
+    assert introspector.cache_ttl(5000, now=1000) == 30
+    assert introspector.cache_ttl(900, now=1000) == 0
+    assert introspector.cache_ttl(None, now=1000) == 30
+
+
+def test_introspection_requires_a_service_token_and_checks_versions(api, database):
+    async def create(email: str, roles: list[str]) -> User:
+        async with UnitOfWork(database.session_maker) as uow:
+            repository = SQLAlchemyRepository(User, uow)
+            user = await repository.create_one(UserCreate(email=email, password="hash"))
+            await repository.update_by({"id": user.id}, {"roles": roles})
+        return user
+
+    async def bump_version(idx: int) -> None:
+        async with UnitOfWork(database.session_maker) as uow:
+            await SQLAlchemyRepository(User, uow).update_by({"id": idx}, {"version": 2})
+
+    def stale_token(user: User) -> str:
+        payload = JWTToken.create_payload(user, "access", timedelta(minutes=5))
+        payload.claims_iat = payload.iat - settings.auth_jwt.claims_max_age_seconds - 1
+        return JWTToken.create_jwt(payload)
+
+    user = api.portal.call(create, "user@example.com", [])
+    service = api.portal.call(create, "gateway@example.com", ["service"])
+    tokens = [JWTToken.create_access_token(user), stale_token(user)]
+    assert api.post("/auth/introspect", json={"tokens": tokens}).status_code == 403
+    api.cookies.set("access_token", JWTToken.create_access_token(user))
+    assert api.post("/auth/introspect", json={"tokens": tokens}).status_code == 403
+
+    api.cookies.set("access_token", JWTToken.create_access_token(service))
+    response = api.post("/auth/introspect", json={"tokens": tokens})
+    assert [result["active"] for result in response.json()["results"]] == [True, True]
+    api.portal.call(bump_version, user.id)
+    response = api.post("/auth/introspect", json={"tokens": tokens})
+    # Fresh claims are trusted until they age; older ones meet the new version.
+    results = response.json()["results"]
+    assert [result["active"] for result in results] == [True, False]
+    assert results[1]["error"] == "Token outdated"
@@ -0,0 +1,26 @@
+import pytest
+from jwt import decode, encode
+
+from benchmarks.keys import generate_keys, generate_pem_pair
+from src.utils.jwt_keys import JWTKeys
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256", "EdDSA"])
+def test_keys_sign_and_verify(algorithm):
+    keys = generate_keys(algorithm)
+    token = encode({"sub": 1}, keys.private_key, algorithm=algorithm)
+    assert decode(token, keys.public_key, algorithms=[algorithm]) == {"sub": 1}
+    assert keys.jwk["kty"] in JWTKeys.THUMBPRINT_MEMBERS
+    assert keys.kid == JWTKeys.thumbprint(keys.jwk)
+
+
+def test_keys_reject_wrong_algorithm():
+    with pytest.raises(ValueError):
+        JWTKeys("ES384", *generate_pem_pair("ES256"))
+
+
+def test_keys_reject_mismatched_public_key():
+    private_pem, _ = generate_pem_pair("EdDSA")
+    _, public_pem = generate_pem_pair("EdDSA")
+    with pytest.raises(ValueError):
+        JWTKeys("EdDSA", private_pem, public_pem)
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+from jwt import encode
+
+from benchmarks.keys import generate_keys
+from src.auth.schemas import Payload
+from src.database import UnitOfWork
+from src.repositories.base import SQLAlchemyRepository
+from src.users.models import User
+from src.users.schemas import UserCreate
+from src.utils.jwt_token import JWTToken
+
+
+def unknown_kid_token(kid: str | None) -> str:
+    # Signed by a key the keyring has never seen, or that has been retired.
+    keys = generate_keys("ES256")
+    now = time.time()
+    payload = Payload(sub=1, exp=now + 60, iat=now, token_type="access")
+    return encode(
+        payload.model_dump(),
+        keys.private_key,
+        algorithm=keys.algorithm,
+        headers={"kid": kid or keys.kid},
+    )
+
+
+async def create_service_user(database) -> User:
+    async with UnitOfWork(database.session_maker) as uow:
+        repository = SQLAlchemyRepository(User, uow)
+        user = await repository.create_one(
+            UserCreate(email="gateway@example.com", password="hash")
+        )
+        await repository.update_by({"id": user.id}, {"roles": ["service"]})
+    return user
+
+
+@pytest.mark.parametrize("kid", [None, "retired-key"])
+def test_unknown_kid_is_an_invalid_token(api, database, kid):
+    token = unknown_kid_token(kid)
+
+    api.cookies.set("access_token", token)
+    me = api.get("/auth/me")
+    assert me.status_code == 403
+    assert me.json() == {"detail": "Invalid token"}
+
+    valid = JWTToken.create_access_token(api.portal.call(create_service_user, database))
+    api.cookies.set("access_token", valid)
+    response = api.post("/auth/introspect", json={"tokens": [token, valid]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["active"] for result in results] == [False, True]
+    assert results[0]["error"] == "Invalid token"
@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+from jwt import decode, encode
+
+from benchmarks.keys import generate_pem_pair
+from src.auth.schemas import Payload
+from src.utils.keyring import KeyRing
+from src.utils.token_cache import VerifiedTokenCache
+
+
+def write_pair(keys_dir, name, algorithm, mtime, public_only=False):
+    private_pem, public_pem = generate_pem_pair(algorithm)
+    (keys_dir / f"{name}-public.pem").write_bytes(public_pem)
+    if not public_only:
+        private_path = keys_dir / f"{name}-private.pem"
+        private_path.write_bytes(private_pem)
+        os.utime(private_path, (mtime, mtime))
+
+
+def test_keyring_signs_with_newest_key_and_verifies_all(tmp_path):
+    write_pair(tmp_path, "old", "RS256", 1_000)
+    write_pair(tmp_path, "new", "ES256", 2_000)
+    keyring = KeyRing(tmp_path, "RS256")
+    keyring.load()
+
+    assert keyring.active.algorithm == "ES256"
+    assert len(keyring.jwks()["keys"]) == 2
+    for keys in keyring.keys.values():
+        token = encode({"sub": 1}, keys.private_key, algorithm=keys.algorithm)
+        verifier = keyring.get(keys.kid)
+        assert verifier is not None
+        assert decode(token, verifier.public_key, algorithms=[verifier.algorithm])
+
+
+def test_keyring_keeps_retired_public_keys(tmp_path):
+    write_pair(tmp_path, "current", "EdDSA", 2_000)
+    write_pair(tmp_path, "retired", "RS256", 1_000, public_only=True)
+    keyring = KeyRing(tmp_path, "RS256", active_key="current")
+    keyring.load()
+
+    assert keyring.active.algorithm == "EdDSA"
+    retired = [keys for keys in keyring.keys.values() if keys.private_key is None]
+    assert [keys.algorithm for keys in retired] == ["RS256"]
+
+
+def test_keyring_requires_signing_key(tmp_path):
+    write_pair(tmp_path, "retired", "RS256", 1_000, public_only=True)
+    with pytest.raises(ValueError):
+        KeyRing(tmp_path, "RS256").load()
+
+
+def test_keyring_ignores_other_pem_files(tmp_path):
+    write_pair(tmp_path, "current", "RS256", 1_000)
+    (tmp_path / "ca-bundle.pem").write_bytes(generate_pem_pair("RS256")[1])
+    keyring = KeyRing(tmp_path, "RS256")
+    keyring.load()
+    assert len(keyring.keys) == 1
+
+
+def test_token_cache_forgets_tokens_of_retired_keys(tmp_path):
+    write_pair(tmp_path, "current", "RS256", 2_000)
+    write_pair(tmp_path, "old", "RS256", 1_000)
+    keyring = KeyRing(tmp_path, "RS256", active_key="current")
+    keyring.load()
+    cache = VerifiedTokenCache(maxsize=10, keyring=keyring)
+    now = time.time()
+    cache.set("token", Payload(sub=1, exp=now + 60, iat=now, token_type="access"))
+
+    keyring.load()
+    assert cache.get("token") is not None
+    for path in tmp_path.glob("old-*.pem"):
+        path.unlink()
+    keyring.load()
+    assert cache.get("token") is None
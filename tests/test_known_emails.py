@@ -0,0 +1,87 @@
+import asyncio
+
+from src.auth import known_emails as known_emails_module
+from src.auth.known_emails import KnownEmails
+from src.database import UnitOfWork
+from src.repositories.base import SQLAlchemyRepository
+from src.users.models import User
+from src.users.schemas import UserCreate
+
+SYNC_INTERVAL_SECONDS = 0.05
+
+
+def make_known_emails(database) -> KnownEmails:
+    return KnownEmails(
+        capacity=100,
+        sync_interval_seconds=SYNC_INTERVAL_SECONDS,
+        chunk_size=2,
+        session_maker=database.session_maker,
+    )
+
+
+async def create(database, email: str) -> User:
+    async with UnitOfWork(database.session_maker) as uow:
+        repository = SQLAlchemyRepository(User, uow)
+        return await repository.create_one(UserCreate(email=email, password="secret"))
+
+
+def test_misses_go_to_the_database_until_a_sync_covers_new_accounts(
+    database, monkeypatch
+):
+    monkeypatch.setattr(known_emails_module.accounts_changed_at, "value", 0.0)
+    worker, other_worker = make_known_emails(database), make_known_emails(database)
+
+    async def main():
+        async with database:
+            for idx in range(5):
+                await create(database, f"user{idx}@example.com")
+            await worker.load()
+            await other_worker.load()
+            assert all(worker.might_exist(f"user{idx}@example.com") for idx in range(5))
+            assert not worker.might_exist("second@example.com")
+            # Registered through the other worker, which announces it.
+            await create(database, "second@example.com")
+            other_worker.add("second@example.com")
+            assert worker.might_exist("second@example.com")
+            assert worker.might_exist("unknown@example.com")
+            await asyncio.sleep(1.5 * SYNC_INTERVAL_SECONDS)
+            await worker.sync()
+            assert worker.might_exist("second@example.com")
+            assert not worker.might_exist("unknown@example.com")
+
+    asyncio.run(main())
+    assert worker.negatives == 2
+
+
+def test_sync_picks_up_changed_emails(database, monkeypatch):
+    monkeypatch.setattr(known_emails_module.accounts_changed_at, "value", 0.0)
+    worker = make_known_emails(database)
+
+    async def main():
+        async with database:
+            user = await create(database, "old@example.com")
+            await worker.load()
+            async with UnitOfWork(database.session_maker) as uow:
+                await SQLAlchemyRepository(User, uow).update_by(
+                    {"id": user.id}, {"email": "new@example.com"}
+                )
+            assert not worker.might_exist("new@example.com")
+            await worker.sync()
+            assert worker.might_exist("new@example.com")
+
+    asyncio.run(main())
+
+
+def test_a_stale_filter_leaves_misses_to_the_database(database, monkeypatch):
+    monkeypatch.setattr(known_emails_module.accounts_changed_at, "value", 0.0)
+    worker = make_known_emails(database)
+
+    async def main():
+        async with database:
+            await worker.load()
+            assert not worker.might_exist("unknown@example.com")
+            # No sync has run for two intervals, e.g. the database is down.
+            await asyncio.sleep(2 * SYNC_INTERVAL_SECONDS)
+            assert worker.might_exist("unknown@example.com")
+
+    asyncio.run(main())
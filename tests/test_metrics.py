@@ -0,0 +1,77 @@
+import asyncio
+
+from config import settings
+from src.utils.metrics import MetricsRegistry, StageTimers
+from src.utils.profiling import SamplingProfiler
+
+
+def test_prometheus_renders_gauges_and_labelled_histograms():
+    registry = MetricsRegistry()
+    timers = StageTimers()
+    timers.observe("db.filter_by", 0.002)
+    registry.register("pool", lambda: {"size": 5, "cache": {"hits": 2}})
+    registry.register("stage_duration_seconds", timers.collect, label="stage")
+
+    text = registry.prometheus()
+    assert "# TYPE pool_size gauge\npool_size 5.0\n" in text
+    assert "pool_cache_hits 2.0" in text
+    assert "# TYPE stage_duration_seconds histogram" in text
+    assert 'stage_duration_seconds_bucket{stage="db.filter_by",le="0.001"} 0.0' in text
+    assert 'stage_duration_seconds_bucket{stage="db.filter_by",le="+Inf"} 1.0' in text
+    assert 'stage_duration_seconds_count{stage="db.filter_by"} 1.0' in text
+
+
+def test_timed_records_sync_and_async_stages_per_request():
+    timers = StageTimers()
+
+    @timers.timed("sync")
+    def work() -> int:
+        return 1
+
+    @timers.timed("async")
+    async def async_work() -> int:
+        return 2
+
+    timings: dict[str, float] = {}
+    timers.current.set(timings)
+    assert work() + asyncio.run(async_work()) == 3
+    assert {stage: h["count"] for stage, h in timers.collect().items()} == {
+        "async": 1,
+        "sync": 1,
+    }
+    assert timings.keys() == {"sync", "async"}
+
+
+def test_profiler_dumps_folded_stacks_of_a_window(tmp_path):
+    profiler = SamplingProfiler(tmp_path)
+    profiler.samples.extend([(1.0, "MainThread;a;b"), (2.0, "MainThread;a;b")])
+    profiler.samples.append((5.0, "MainThread;c"))
+
+    path = profiler.dump("GET_auth_login", 0.5, 2.5)
+    assert path is not None
+    assert path.read_text() == "MainThread;a;b 2\n"
+    assert profiler.dump("GET_auth_login", 3.0, 4.0) is None
+
+
+def test_pool_stats_track_checkouts(database):
+    registry = MetricsRegistry()
+    registry.register("db_pool", database.primary.pool.stats)
+
+    async def main():
+        async with database:
+            async with database.primary.connect():
+                return registry.prometheus()
+
+    text = asyncio.run(main())
+    assert "db_pool_checked_out 1.0" in text
+    assert "# TYPE db_pool_checkout_seconds histogram" in text
+    # Schema creation and the held connection were both checkouts.
+    assert "db_pool_checkout_seconds_count 2.0" in text
+
+
+def test_metrics_endpoint_exports_db_pool(api):
+    response = api.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE db_pool_size gauge" in response.text
+    assert f"db_pool_size {float(settings.database.pool_size)}" in response.text
+    assert 'db_pool_checkout_seconds_bucket{le="+Inf"}' in response.text
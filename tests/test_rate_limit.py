@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from src.auth.rate_limit import LoginRateLimiter, MemoryRateLimiterBackend
+
+
+def make_request(host: str) -> Request:
+    return Request({"type": "http", "headers": [], "client": (host, 1234)})
+
+
+def test_memory_backend_slides_the_window():
+    backend = MemoryRateLimiterBackend(maxsize=10)
+
+    async def main():
+        assert await backend.hit("key", 2, 0.05) is None
+        assert await backend.hit("key", 2, 0.05) is None
+        retry_after = await backend.hit("key", 2, 0.05)
+        assert retry_after is not None and retry_after > 0
+        # Two windows later nothing from the earlier bursts still counts.
+        await asyncio.sleep(0.1)
+        assert await backend.hit("key", 2, 0.05) is None
+
+    asyncio.run(main())
+
+
+def test_login_rate_limiter_limits_by_email_and_ip():
+    limiter = LoginRateLimiter(
+        MemoryRateLimiterBackend(), ip_limit=3, email_limit=2, window_seconds=60
+    )
+
+    async def main():
+        for _ in range(2):
+            await limiter.check(make_request("10.0.0.1"), "user@example.com")
+        with pytest.raises(HTTPException) as error:
+            await limiter.check(make_request("10.0.0.2"), "USER@example.com")
+        assert error.value.status_code == 429
+        await limiter.check(make_request("10.0.0.1"), "other@example.com")
+        with pytest.raises(HTTPException):
+            await limiter.check(make_request("10.0.0.1"), "third@example.com")
+
+    asyncio.run(main())
+    assert limiter.rejected == 2
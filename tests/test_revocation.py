@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+from src.auth.revocation import DatabaseRevocationStore, MemoryRevocationStore
+from src.utils.cache import ExpiringSet
+
+
+def test_expiring_set_forgets_expired_keys():
+    expiring = ExpiringSet(bucket_seconds=0.01)
+    expiring.add("old", time.time() + 0.01)
+    expiring.add("new", time.time() + 60)
+    time.sleep(0.03)
+    assert "old" not in expiring
+    expiring.add("other", time.time() + 60)
+    assert "new" in expiring
+    assert len(expiring) == 2
+
+
+def test_memory_store_detects_reuse():
+    store = MemoryRevocationStore()
+    exp = time.time() + 60
+
+    async def main():
+        assert await store.consume("jti-1", "family", exp)
+        assert not await store.consume("jti-1", "family", exp)
+        await store.revoke("family", exp)
+        assert not await store.consume("jti-2", "family", exp)
+
+    asyncio.run(main())
+    assert store.stats()["reuse_detected"] == 1
+
+
+def test_database_store_shares_consumed_tokens_and_revocations(database):
+    exp = time.time() + 60
+
+    async def main():
+        async with database:
+            first = DatabaseRevocationStore(database.session_maker)
+            second = DatabaseRevocationStore(database.session_maker)
+            # A replay is caught by another worker without waiting for a sync.
+            assert await first.consume("jti-1", "family", exp)
+            assert not await second.consume("jti-1", "family", exp)
+            await first.revoke("family", exp)
+            assert not await second.consume("jti-2", "family", exp)
+            await first.consume("jti-3", "other", time.time() - 1)
+            await second.cleanup()
+            return second.stats()
+
+    assert asyncio.run(main()) == {"reuse_detected": 1, "cleaned_up": 1}
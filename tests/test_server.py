@@ -0,0 +1,122 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from config import Server, settings
+from src.server import PreforkServer
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+# A server with one worker that answers with its pid, after a delay for
+# /slow. The preload hook reports the bound port on every (re)start.
+SERVER_SCRIPT = textwrap.dedent(
+    """
+    import asyncio
+    import os
+
+    from config import Server
+    from src.server import PreforkServer
+
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while (await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+        if scope["path"] == "/slow":
+            await asyncio.sleep(1)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": str(os.getpid()).encode()})
+
+
+    config = Server(
+        host="127.0.0.1", port=0, workers=1, loop="asyncio", http="h11",
+        timeout_graceful_shutdown=5,
+    )
+    server = PreforkServer(app, config)
+    server.preload = lambda: print(server.socket.getsockname()[1], flush=True)
+    server.run()
+    """
+)
+
+
+def get(port: int, path: str = "/") -> str:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=10) as reply:
+        return reply.read().decode()
+
+
+def wait_for_pid(port: int, other_than: str | None = None) -> str:
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            pid = get(port)
+            if pid != other_than:
+                return pid
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        if time.monotonic() > deadline:
+            raise TimeoutError("The worker was not replaced")
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def server():
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVER_SCRIPT],
+        cwd=Path(__file__).parent.parent,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    assert process.stdout is not None
+    try:
+        yield process, int(process.stdout.readline())
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def test_sighup_replaces_workers_without_dropping_requests(server):
+    process, port = server
+    old_pid = wait_for_pid(port)
+    with ThreadPoolExecutor(1) as executor:
+        in_flight = executor.submit(get, port, "/slow")
+        time.sleep(0.3)
+        process.send_signal(signal.SIGHUP)
+        new_pid = wait_for_pid(port, other_than=old_pid)
+        # The old worker finishes the request it had accepted.
+        assert in_flight.result() == old_pid
+    assert new_pid != old_pid
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=10) == 0
+
+
+def test_sigterm_waits_for_in_flight_requests(server):
+    process, port = server
+    pid = wait_for_pid(port)
+    with ThreadPoolExecutor(1) as executor:
+        in_flight = executor.submit(get, port, "/slow")
+        time.sleep(0.3)
+        process.send_signal(signal.SIGTERM)
+        assert in_flight.result() == pid
+    assert process.wait(timeout=10) == 0
+
+
+def test_several_workers_refuse_the_memory_revocation_backend(monkeypatch):
+    async def app(scope, receive, send) -> None:
+        pass
+
+    monkeypatch.setattr(settings.revocation, "backend", "memory")
+    with pytest.raises(RuntimeError, match="REVOCATION__BACKEND=database"):
+        PreforkServer(app, Server(workers=2)).run()
@@ -0,0 +1,29 @@
+import time
+
+from src.auth.schemas import Payload
+from src.utils.token_cache import VerifiedTokenCache
+
+
+def make_payload(expires_in: float) -> Payload:
+    now = time.time()
+    return Payload(sub=1, exp=now + expires_in, iat=now, token_type="access")
+
+
+def test_verified_token_cache_returns_copies():
+    cache = VerifiedTokenCache(maxsize=10)
+    cache.set("token", make_payload(60))
+    payload = cache.get("token")
+    assert payload is not None
+    payload.token_type = "refresh"
+    cached = cache.get("token")
+    assert cached is not None and cached.token_type == "access"
+    assert cache.stats()["hits"] == 2
+
+
+def test_verified_token_cache_expires_with_token():
+    cache = VerifiedTokenCache(maxsize=10)
+    cache.set("expired", make_payload(-1))
+    cache.set("short", make_payload(0.01))
+    time.sleep(0.02)
+    assert cache.get("expired") is None
+    assert cache.get("short") is None
@@ -1,6 +1,89 @@
+import orjson
+
+from src.auth.known_emails import KnownEmails
+from src.database import UnitOfWork
+from src.repositories.base import SQLAlchemyRepository
+from src.users.models import User
+from src.users.schemas import UserCreate
 from tests.client import client
 
 
+def create_users(api, database, count: int) -> list[int]:
+    async def create() -> list[int]:
+        async with UnitOfWork(database.session_maker) as uow:
+            created = await SQLAlchemyRepository(User, uow).create_many(
+                [
+                    UserCreate(email=f"user{idx}@example.com", password="hash")
+                    for idx in range(count)
+                ]
+            )
+        return sorted(user.id for user in created)
+
+    return api.portal.call(create)
+
+
 def test_users_all():
     response = client.get("/users")
     assert response.status_code == 200
+
+
+def test_users_pages_follow_the_next_cursor(api, database):
+    ids = create_users(api, database, 5)
+    pages, cursors = [], []
+    params = {"limit": 2}
+    while True:
+        response = api.get("/users/", params=params)
+        assert response.status_code == 200
+        pages.append([row["id"] for row in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        cursors.append(cursor)
+        params["after_id"] = cursor
+
+    assert pages == [ids[:2], ids[2:4], ids[4:]]
+    assert cursors == [str(ids[1]), str(ids[3])]
+    assert set(response.json()[0]) == {"id", "email", "roles", "version"}
+
+
+def test_users_full_last_page_is_followed_by_an_empty_one(api, database):
+    ids = create_users(api, database, 2)
+    response = api.get("/users/", params={"limit": 2})
+    assert response.headers["X-Next-Cursor"] == str(ids[-1])
+    response = api.get("/users/", params={"limit": 2, "after_id": ids[-1]})
+    assert response.json() == []
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_users_stream_as_ndjson(api, database):
+    ids = create_users(api, database, 3)
+    response = api.get(
+        "/users/",
+        params={"after_id": ids[0]},
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [row["id"] for row in rows] == ids[1:]
+    assert rows[0]["email"] == "user1@example.com"
+
+
+def test_create_duplicate_user_conflicts(api):
+    body = {"email": "user@example.com", "password": "secret"}
+    created = api.post("/users/create", json=body)
+    assert created.status_code == 200
+    duplicate = api.post("/users/create", json=body)
+    assert duplicate.status_code == 409
+    assert duplicate.json() == {"detail": "User already exists"}
+    assert len(api.get("/users/").json()) == 1
+
+
+def test_created_users_are_added_to_known_emails(api, database, monkeypatch):
+    known_emails = KnownEmails(capacity=10, session_maker=database.session_maker)
+    api.portal.call(known_emails.load)
+    monkeypatch.setattr("src.services.users.known_emails", known_emails)
+    response = api.post(
+        "/users/create", json={"email": "user@example.com", "password": "secret"}
+    )
+    assert response.status_code == 200
+    assert known_emails.filter is not None and "user@example.com" in known_emails.filter